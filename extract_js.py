@@ -2,29 +2,66 @@
 import asyncio
 import aiohttp
 import re
+from lxml import html as lxml_html
 
-async def find_data_source():
+# Compiled once at import so repeated scans skip the re-cache lookup
+_KW_SCRIPT_RE = re.compile(r'fetch|ajax|\.get\(|api/|data|status', re.IGNORECASE)
+# Multiline so one scan over the whole script body captures the
+# interesting lines without splitting and testing each line in Python
+_KW_LINE_RE = re.compile(r'^.*(?:fetch|ajax|\.get\(|/api/|url:|endpoint|status).*$',
+                         re.IGNORECASE | re.MULTILINE)
+
+# Lazily-created shared session so repeated calls reuse pooled keep-alive
+# connections instead of paying a TCP+TLS handshake per request
+_session = None
+
+async def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=8, keepalive_timeout=75),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    return _session
+
+async def _close_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+async def find_data_source(session=None):
     url = "https://disaster.townsville.qld.gov.au/"
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            content = await response.text()
-            
-            # Find all script tags
-            scripts = re.findall(r'<script[^>]*>(.*?)</script>', content, re.DOTALL | re.IGNORECASE)
-            
-            print(f"Found {len(scripts)} script blocks\n")
-            
-            for i, script in enumerate(scripts):
-                if len(script) > 100:  # Only show substantial scripts
-                    # Look for fetch, ajax, api calls
-                    if any(keyword in script.lower() for keyword in ['fetch', 'ajax', '.get(', 'api/', 'data', 'status']):
-                        print(f"\n{'='*60}")
-                        print(f"Script {i} (length: {len(script)}):")
-                        print('='*60)
-                        # Show lines containing interesting keywords
-                        for line in script.split('\n'):
-                            if any(kw in line.lower() for kw in ['fetch', 'ajax', '.get(', '/api/', 'url:', 'endpoint', 'status']):
-                                print(line.strip())
-
-asyncio.run(find_data_source())
+
+    if session is None:
+        session = await _get_session()
+
+    async with session.get(url) as response:
+        # Fetch raw bytes - lxml parses the encoded document directly
+        content = await response.read()
+
+        # Walk <script> nodes with a real HTML parser instead of a
+        # backtracking DOTALL regex (which misfires on </script inside
+        # strings and gets slow on large pages)
+        tree = lxml_html.fromstring(content)
+        scripts = [node.text or '' for node in tree.iter('script')]
+
+        print(f"Found {len(scripts)} script blocks\n")
+
+        for i, script in enumerate(scripts):
+            if len(script) > 100:  # Only show substantial scripts
+                # Look for fetch, ajax, api calls
+                if _KW_SCRIPT_RE.search(script):
+                    print(f"\n{'='*60}")
+                    print(f"Script {i} (length: {len(script)}):")
+                    print('='*60)
+                    # Show lines containing interesting keywords
+                    for line in _KW_LINE_RE.findall(script):
+                        print(line.strip())
+
+
+async def _main():
+    try:
+        await find_data_source()
+    finally:
+        await _close_session()
+
+asyncio.run(_main())
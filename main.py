@@ -4,10 +4,17 @@ Forewarned - Home Assistant Weather Alerting & EOC State Monitor
 import os
 import logging
 import asyncio
-from flask import Flask
-from threading import Thread
+import uvicorn
 
-from src.config import load_config
+# Use uvloop's Cython event loop when available - the pollers and HA API
+# calls are socket-heavy, and Uvicorn picks it up automatically too
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+from src.config import load_config, feature_enabled
 from src.weather_monitor import WeatherMonitor
 from src.eoc_monitor import EOCMonitor
 from src.web_ui import create_app, app_state, update_local_alert_state
@@ -24,44 +31,46 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def run_monitors():
+async def run_monitors(config, app=None):
     """Run the monitoring tasks"""
-    config = load_config()
-    
     # Initialize Home Assistant client
     ha_client = HomeAssistantClient(
         supervisor_token=os.getenv('SUPERVISOR_TOKEN')
     )
     
+    # Start the MQTT broker connection first so its handshake overlaps
+    # the (potentially slow) VOIP/SIP initialization below
+    mqtt_client = None
+    mqtt_connect_task = None
+    if feature_enabled(config, 'mqtt'):
+        logger.info("MQTT integration enabled - attempting to connect...")
+        mqtt_client = MQTTIntegration(
+            config.get('mqtt', {}),
+            state_change_callback=None  # Will be set by alert_manager
+        )
+        mqtt_connect_task = asyncio.create_task(mqtt_client.connect())
+    else:
+        logger.info("MQTT integration disabled - manual switches will use REST API (no unique IDs)")
+
     # Initialize VOIP integration (if configured)
     voip_integration = None
-    if 'voip' in config and config['voip'].get('enabled', False):
+    if feature_enabled(config, 'voip'):
         logger.info("Initializing VOIP integration...")
         voip_integration = VOIPIntegration(
             config.get('voip', {}),
             lambda: app_state.get('local_alert_state', {})
         )
         logger.info(f"VOIP integration initialized with backend: {config['voip'].get('backend', 'webhook')}")
-    
-    # Initialize MQTT integration (if configured)
-    mqtt_client = None
-    if 'mqtt' in config and config['mqtt'].get('enabled', False):
-        logger.info("MQTT integration enabled - attempting to connect...")
-        mqtt_client = MQTTIntegration(
-            config.get('mqtt', {}),
-            state_change_callback=None  # Will be set by alert_manager
-        )
-        
-        # Connect to MQTT broker
-        if await mqtt_client.connect():
+
+    # Wait for the MQTT connection before wiring up the alert manager
+    if mqtt_connect_task is not None:
+        if await mqtt_connect_task:
             logger.info("✓ MQTT integration connected successfully")
         else:
             logger.warning("✗ MQTT connection failed - manual switches will use REST API fallback")
             logger.warning("To enable MQTT: Install Mosquitto addon and set mqtt_enabled=true in addon config")
             mqtt_client = None
-    else:
-        logger.info("MQTT integration disabled - manual switches will use REST API (no unique IDs)")
-    
+
     # Initialize local alert manager
     alert_manager = LocalAlertManager(
         config, 
@@ -78,21 +87,25 @@ async def run_monitors():
     # Store alert manager in app state for access by monitors
     app_state['alert_manager'] = alert_manager
     app_state['voip_integration'] = voip_integration
+    if app is not None:
+        app.voip_integration = voip_integration
     
     # Initialize monitors with shared state
     weather_monitor = WeatherMonitor(config, ha_client, app_state)
     eoc_monitor = EOCMonitor(config, ha_client, app_state)
     
-    # Start monitoring tasks
-    await asyncio.gather(
-        weather_monitor.start(),
-        eoc_monitor.start()
-    )
-
-
-def start_monitoring():
-    """Start the monitoring loop in async context"""
-    asyncio.run(run_monitors())
+    # Start monitoring tasks - TaskGroup cancels the sibling cleanly if
+    # one monitor dies, so the supervisor can restart the addon instead
+    # of it limping along with a single live monitor
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(weather_monitor.start())
+            tg.create_task(eoc_monitor.start())
+    finally:
+        await eoc_monitor.close()
+        if voip_integration is not None:
+            await voip_integration.close()
+        await ha_client.close()
 
 
 def main():
@@ -100,25 +113,35 @@ def main():
     logger.info("=" * 60)
     logger.info("Starting Forewarned - Weather & EOC Monitor")
     logger.info("=" * 60)
-    
+
     try:
         # Load configuration
         config = load_config()
-        
-        # Start monitoring in background thread
-        monitor_thread = Thread(target=start_monitoring, daemon=True)
-        monitor_thread.start()
-        
+
         # Start web UI
         app = create_app()
-        
-        # Store VOIP integration reference in Flask app
+
+        # Store VOIP integration reference in the app
         # (will be populated when monitors start)
         app.voip_integration = None
-        
+
+        # Run the monitors on the server's event loop - everything shares
+        # one loop, so app_state access needs no cross-thread signalling
+        @app.before_serving
+        async def _start_monitors():
+            app.monitor_task = asyncio.create_task(run_monitors(config, app))
+
+        @app.after_serving
+        async def _stop_monitors():
+            app.monitor_task.cancel()
+            try:
+                await app.monitor_task
+            except asyncio.CancelledError:
+                pass
+
         port = int(os.getenv('PORT', 5000))
         logger.info(f"Starting web server on port {port}")
-        app.run(host='0.0.0.0', port=port, debug=True)
+        uvicorn.run(app, host='0.0.0.0', port=port, log_level='info')
         
     except KeyboardInterrupt:
         logger.info("Shutting down...")
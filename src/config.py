@@ -1,184 +1,260 @@
 """Configuration management for Forewarned"""
 import os
+import copy
 import json
 import logging
 
+# Prefer orjson for parsing/serializing config; fall back to stdlib json
+# so the addon still boots without the wheel
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
+# Memoized load_config result, keyed on the backing file's mtime so edits
+# to options.json still invalidate the cache
+_config_cache = {'key': None, 'config': None}
 
-def load_config():
+# Flat addon option -> nested section key mappings (built once, walked in
+# a single pass instead of scanning all keys per prefix)
+_VOIP_KEYS = (
+    ('enabled', 'voip_enabled', False),
+    ('backend', 'voip_backend', 'webhook'),
+    ('sip_server', 'voip_sip_server', ''),
+    ('sip_user', 'voip_sip_user', ''),
+    ('sip_password', 'voip_sip_password', ''),
+    ('sip_domain', 'voip_sip_domain', ''),
+    ('sip_port', 'voip_sip_port', 5060),
+    ('webhook_url', 'voip_webhook_url', ''),
+    ('webhook_method', 'voip_webhook_method', 'POST'),
+    ('alert_numbers', 'voip_alert_numbers', []),
+    ('tts_voice', 'voip_tts_voice', 'en-us'),
+    ('tts_speed', 'voip_tts_speed', 160),
+)
+_VOIP_AUTH_KEYS = (
+    ('type', 'voip_webhook_auth_type', 'none'),
+    ('username', 'voip_webhook_username', ''),
+    ('password', 'voip_webhook_password', ''),
+    ('token', 'voip_webhook_token', ''),
+)
+_MQTT_KEYS = (
+    ('enabled', 'mqtt_enabled', True),
+    ('broker', 'mqtt_broker', 'core-mosquitto'),
+    ('port', 'mqtt_port', 1883),
+    ('username', 'mqtt_username', ''),
+    ('password', 'mqtt_password', ''),
+)
+
+# Environment variable overrides applied after the config files
+_ENV_OVERRIDES = (
+    ('weather_api_key', 'WEATHER_API_KEY', str),
+    ('check_interval', 'CHECK_INTERVAL', int),
+)
+
+_EMPTY = {}
+
+
+def feature_enabled(config, key, default=False):
     """
-    Load configuration from Home Assistant addon options
-    
+    Check whether an integration section (e.g. 'voip', 'mqtt') is present
+    and enabled
+
+    Args:
+        config: Configuration dictionary
+        key: Integration section name
+        default: Value to return when the section has no 'enabled' flag
+
     Returns:
-        dict: Configuration dictionary
+        bool: True if the integration is enabled
     """
-    config_path = '/data/options.json'
-    
-    # Default configuration
-    default_config = {
-        'weather_api_key': '',
-        'check_interval': 300,  # 5 minutes
-        'eoc_urls': [
-            'https://disaster.townsville.qld.gov.au/'
-        ],
-        'weather_sources': {
-            'bom': True,  # Australian Bureau of Meteorology
+    return config.get(key, _EMPTY).get('enabled', default)
+
+
+# Default configuration, built once at import; load_config deep-copies it
+# per call instead of re-allocating the whole literal
+_DEFAULT_CONFIG = {
+    'weather_api_key': '',
+    'check_interval': 300,  # 5 minutes
+    'eoc_urls': [
+        'https://disaster.townsville.qld.gov.au/'
+    ],
+    'weather_sources': {
+        'bom': True,  # Australian Bureau of Meteorology
+    },
+    'location': 'Townsville',  # Primary location to monitor
+    'alert_types': [
+        'Severe Thunderstorm Warning',
+        'Severe Weather Warning',
+        'Flood Warning',
+        'Fire Weather Warning',
+        'Tropical Cyclone Warning',
+        'Tsunami Warning',
+        'Heatwave Warning'
+    ],
+    'routines': {
+        # Legacy routine keys (deprecated, use local alert levels instead)
+        'tornado_warning': [],
+        'severe_weather': [],
+        'eoc_activated': [],
+        'eoc_alert': [],
+        'eoc_lean_forward': [],
+        'eoc_stand_up': [],
+        'eoc_stand_down': [],
+        # Local alert state routines (recommended)
+        'advisory_alert': [],      # Minor alerts, informational
+        'watch_alert': [],          # Moderate alerts, prepare
+        'warning_alert': [],        # Severe alerts, take action
+        'emergency_alert': [],      # Extreme alerts, immediate action
+        'alert_cleared': []         # All alerts cleared
+    },
+    'alert_rules': {
+        'advisory': {
+            'weather_conditions': {
+                'operator': 'or',  # 'and' or 'or'
+                'rules': [
+                    {'type': 'any', 'severity': 'minor'}
+                ]
+            },
+            'eoc_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'state': 'alert'},
+                    {'state': 'stand down'}
+                ]
+            },
+            'condition_logic': 'or'  # 'and' or 'or' between weather and eoc
         },
-        'location': 'Townsville',  # Primary location to monitor
-        'alert_types': [
-            'Severe Thunderstorm Warning',
-            'Severe Weather Warning',
-            'Flood Warning',
-            'Fire Weather Warning',
-            'Tropical Cyclone Warning',
-            'Tsunami Warning',
-            'Heatwave Warning'
-        ],
-        'routines': {
-            # Legacy routine keys (deprecated, use local alert levels instead)
-            'tornado_warning': [],
-            'severe_weather': [],
-            'eoc_activated': [],
-            'eoc_alert': [],
-            'eoc_lean_forward': [],
-            'eoc_stand_up': [],
-            'eoc_stand_down': [],
-            # Local alert state routines (recommended)
-            'advisory_alert': [],      # Minor alerts, informational
-            'watch_alert': [],          # Moderate alerts, prepare
-            'warning_alert': [],        # Severe alerts, take action
-            'emergency_alert': [],      # Extreme alerts, immediate action
-            'alert_cleared': []         # All alerts cleared
+        'watch': {
+            'weather_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'type': 'any', 'severity': 'moderate'}
+                ]
+            },
+            'eoc_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'state': 'lean forward'}
+                ]
+            },
+            'condition_logic': 'or'
         },
-        'alert_rules': {
-            'advisory': {
-                'weather_conditions': {
-                    'operator': 'or',  # 'and' or 'or'
-                    'rules': [
-                        {'type': 'any', 'severity': 'minor'}
-                    ]
-                },
-                'eoc_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'state': 'alert'},
-                        {'state': 'stand down'}
-                    ]
-                },
-                'condition_logic': 'or'  # 'and' or 'or' between weather and eoc
+        'warning': {
+            'weather_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'type': 'any', 'severity': 'severe'}
+                ]
+            },
+            'eoc_conditions': {
+                'operator': 'or',
+                'rules': []
             },
-            'watch': {
-                'weather_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'type': 'any', 'severity': 'moderate'}
-                    ]
-                },
-                'eoc_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'state': 'lean forward'}
-                    ]
-                },
-                'condition_logic': 'or'
+            'condition_logic': 'or'
+        },
+        'emergency': {
+            'weather_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'type': 'any', 'severity': 'extreme'},
+                    {'type': 'Tropical Cyclone Warning', 'severity': 'any'}
+                ]
             },
-            'warning': {
-                'weather_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'type': 'any', 'severity': 'severe'}
-                    ]
-                },
-                'eoc_conditions': {
-                    'operator': 'or',
-                    'rules': []
-                },
-                'condition_logic': 'or'
+            'eoc_conditions': {
+                'operator': 'or',
+                'rules': [
+                    {'state': 'stand up'}
+                ]
             },
-            'emergency': {
-                'weather_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'type': 'any', 'severity': 'extreme'},
-                        {'type': 'Tropical Cyclone Warning', 'severity': 'any'}
-                    ]
-                },
-                'eoc_conditions': {
-                    'operator': 'or',
-                    'rules': [
-                        {'state': 'stand up'}
-                    ]
-                },
-                'condition_logic': 'or'
-            }
+            'condition_logic': 'or'
         }
     }
-    
+}
+
+
+def load_config():
+    """
+    Load configuration from Home Assistant addon options
+
+    Returns:
+        dict: Configuration dictionary
+    """
+    config_path = '/data/options.json'
+    local_config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config_data.json')
+
+    # Return the cached config if the backing file hasn't changed
+    cache_key = None
+    for path in (config_path, local_config_path):
+        try:
+            cache_key = (path, os.stat(path).st_mtime)
+            break
+        except OSError:
+            continue
+    if cache_key is not None and cache_key == _config_cache['key']:
+        return copy.deepcopy(_config_cache['config'])
+
+    default_config = copy.deepcopy(_DEFAULT_CONFIG)
+
     try:
-        # Try to load from Home Assistant config
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                user_config = json.load(f)
-                logger.info(f"Loaded configuration from Home Assistant: {config_path}")
+        # Try to load from Home Assistant config (EAFP - one open instead
+        # of a stat + open pair, and no TOCTOU window)
+        try:
+            with open(config_path, 'rb') as f:
+                user_config = _json_loads(f.read())
+            logger.info(f"Loaded configuration from Home Assistant: {config_path}")
+            # Guard so the summary strings (and password redaction) are
+            # only built when debug logging is actually on
+            if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"VoIP settings from options.json: voip_enabled={user_config.get('voip_enabled')}, voip_alert_numbers={user_config.get('voip_alert_numbers')}")
                 logger.debug(f"MQTT settings from options.json: mqtt_enabled={user_config.get('mqtt_enabled')}, mqtt_broker={user_config.get('mqtt_broker')}, mqtt_username={user_config.get('mqtt_username')}, mqtt_password={'***' if user_config.get('mqtt_password') else '(none)'}")
-                default_config.update(user_config)
-        else:
+            default_config.update(user_config)
+        except FileNotFoundError:
             logger.warning(f"Config file not found at {config_path}, using defaults")
-            
+
             # In development mode, try to load from local config file
-            local_config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config_data.json')
-            if os.path.exists(local_config_path):
-                with open(local_config_path, 'r') as f:
-                    user_config = json.load(f)
-                    default_config.update(user_config)
-                    logger.info(f"Loaded configuration from {local_config_path}")
-            
+            try:
+                with open(local_config_path, 'rb') as f:
+                    user_config = _json_loads(f.read())
+                default_config.update(user_config)
+                logger.info(f"Loaded configuration from {local_config_path}")
+            except FileNotFoundError:
+                pass
+
         # Override with environment variables
-        if os.getenv('WEATHER_API_KEY'):
-            default_config['weather_api_key'] = os.getenv('WEATHER_API_KEY')
-        if os.getenv('CHECK_INTERVAL'):
-            default_config['check_interval'] = int(os.getenv('CHECK_INTERVAL'))
+        for key, env_var, convert in _ENV_OVERRIDES:
+            value = os.environ.get(env_var)
+            if value:
+                default_config[key] = convert(value)
         
         # Build VoIP configuration from flat addon options
-        if any(key.startswith('voip_') for key in default_config.keys()):
-            default_config['voip'] = {
-                'enabled': default_config.get('voip_enabled', False),
-                'backend': default_config.get('voip_backend', 'webhook'),
-                'sip_server': default_config.get('voip_sip_server', ''),
-                'sip_user': default_config.get('voip_sip_user', ''),
-                'sip_password': default_config.get('voip_sip_password', ''),
-                'sip_domain': default_config.get('voip_sip_domain', ''),
-                'sip_port': default_config.get('voip_sip_port', 5060),
-                'webhook_url': default_config.get('voip_webhook_url', ''),
-                'webhook_method': default_config.get('voip_webhook_method', 'POST'),
-                'webhook_auth': {
-                    'type': default_config.get('voip_webhook_auth_type', 'none'),
-                    'username': default_config.get('voip_webhook_username', ''),
-                    'password': default_config.get('voip_webhook_password', ''),
-                    'token': default_config.get('voip_webhook_token', '')
-                },
-                'alert_numbers': default_config.get('voip_alert_numbers', []),
-                'tts_voice': default_config.get('voip_tts_voice', 'en-us'),
-                'tts_speed': default_config.get('voip_tts_speed', 160)
-            }
+        if 'voip_enabled' in default_config:
+            voip = {dst: default_config.get(src, dflt) for dst, src, dflt in _VOIP_KEYS}
+            voip['webhook_auth'] = {dst: default_config.get(src, dflt) for dst, src, dflt in _VOIP_AUTH_KEYS}
+            default_config['voip'] = voip
             logger.info(f"VoIP configuration loaded: enabled={default_config['voip']['enabled']}, backend={default_config['voip']['backend']}, tts_voice={default_config['voip']['tts_voice']}, tts_speed={default_config['voip']['tts_speed']}")
-        
+
         # Build MQTT configuration from flat addon options
-        if any(key.startswith('mqtt_') for key in default_config.keys()):
-            default_config['mqtt'] = {
-                'enabled': default_config.get('mqtt_enabled', True),
-                'broker': default_config.get('mqtt_broker', 'core-mosquitto'),
-                'port': default_config.get('mqtt_port', 1883),
-                'username': default_config.get('mqtt_username', ''),
-                'password': default_config.get('mqtt_password', '')
-            }
+        if 'mqtt_enabled' in default_config:
+            default_config['mqtt'] = {dst: default_config.get(src, dflt) for dst, src, dflt in _MQTT_KEYS}
             logger.info(f"MQTT configuration loaded: enabled={default_config['mqtt']['enabled']}, broker={default_config['mqtt']['broker']}, username={'(set)' if default_config['mqtt']['username'] else '(none)'}, password={'(set)' if default_config['mqtt']['password'] else '(none)'}")
             
     except Exception as e:
         logger.error(f"Error loading configuration: {e}")
-        
+
+    _config_cache['key'] = cache_key
+    _config_cache['config'] = copy.deepcopy(default_config)
     return default_config
 
 
@@ -197,8 +273,14 @@ def save_config(config):
             # Development mode - save to local directory
             config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config_data.json')
         
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        # Write to a temp file and rename so a crash mid-write can't leave
+        # a truncated config behind
+        tmp_path = config_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_json_dumps(config))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, config_path)
         logger.info(f"Configuration saved to {config_path}")
     except Exception as e:
         logger.error(f"Error saving configuration: {e}")
@@ -2,13 +2,57 @@
 import logging
 import asyncio
 import aiohttp
+import hashlib
 import json
+import os
+import random
+from dataclasses import dataclass, asdict
 from typing import Dict, List
 from datetime import datetime
-import time
+from urllib.parse import urlparse
+
+# Prefer orjson for parsing API payloads; fall back to stdlib json so
+# the monitor still runs without the wheel
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+__all__ = ['EOCMonitor']
+
+# EOC states from highest to lowest priority; the highest reported state
+# across all monitored sites wins
+PRIORITY_ORDER = ('stand up', 'lean forward', 'alert', 'stand down', 'inactive')
+_STATE_PRIORITY = {state: i for i, state in enumerate(PRIORITY_ORDER)}
+
+# Guardian IMS operationstatus values -> our EOC states (keys casefolded)
+_STATUS_MAP = {
+    'stand up': 'stand up',
+    'standup': 'stand up',
+    'lean forward': 'lean forward',
+    'leanforward': 'lean forward',
+    'alert': 'alert',
+    'stand down': 'stand down',
+    'standdown': 'stand down',
+    'inactive': 'inactive',
+    'closed': 'inactive',
+    'complete': 'inactive'
+}
+
+
+@dataclass(slots=True)
+class EOCSiteState:
+    """Monitored state of a single EOC site"""
+    state: str
+    activated: bool
+    last_check: str
+    operation_name: str = ''
+    operation_status: str = ''
+    description: str = ''
+
 
 class EOCMonitor:
     """Monitor EOC websites for status changes"""
@@ -28,27 +72,137 @@ class EOCMonitor:
         self.check_interval = config.get('check_interval', 300)
         self.eoc_urls = config.get('eoc_urls', [])
         self.eoc_states = {}
-        
+        self._session = None
+        # Per-URL HTTP validators (ETag / Last-Modified) for conditional GETs
+        self._cache_meta = {}
+        # Per-URL digest of the last raw response body for change detection
+        self._body_hashes = {}
+        # Set when a poll produced new data; flushed once per check cycle
+        self._dirty = False
+        # Signature of the last published states, to skip no-op publishes
+        self._last_published = None
+        # Bound concurrent site checks so a long URL list can't exhaust
+        # sockets or hammer the servers
+        self._check_sem = asyncio.Semaphore(config.get('max_concurrent', 8))
+        # Cap how much response body we buffer; the IMS payload is a few
+        # KB, so anything huge is a misbehaving endpoint
+        self._max_body_bytes = config.get('max_response_bytes', 1024 * 1024)
+
         # Guardian IMS API endpoint for Townsville LDMG
         self.guardian_api_url = "https://disaster.townsville.qld.gov.au/dashboard/imsOperation"
-        
+
+        # Hostname -> handler dispatch for supported EOC endpoints; new
+        # councils/APIs get an entry here instead of another substring test
+        self._site_handlers = {
+            'disaster.townsville.qld.gov.au': self.check_guardian_ims,
+        }
+
+        # Restore cached validators/hashes so the first post-restart poll
+        # behaves like steady state instead of a full refetch + reprocess
+        self._cache_path = config.get('eoc_cache_path') or self._default_cache_path()
+        self._cache_dirty = False
+        self._load_cache()
+
         logger.info(f"EOC Monitor initialized with {len(self.eoc_urls)} URL(s)")
         if self.eoc_urls:
             logger.info(f"Monitoring URLs: {self.eoc_urls}")
         else:
             logger.warning("No EOC URLs configured - LDMG monitoring disabled")
         
+    def _default_cache_path(self) -> str:
+        """Pick the cache file location (HA /data in production)"""
+        if os.path.isdir('/data'):
+            return '/data/eoc_cache.json'
+        return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'eoc_cache.json')
+
+    def _load_cache(self):
+        """Load persisted HTTP validators, body hashes and EOC states
+
+        The derived states are restored alongside the validators: with
+        only the validators, the first post-restart poll would take the
+        304 (or unchanged-body) shortcut and leave eoc_states empty
+        until the remote body actually changed, so the alert manager
+        would evaluate against zero EOC states and wrongly clear an
+        alert that was still active.
+        """
+        try:
+            with open(self._cache_path, 'rb') as f:
+                data = json.loads(f.read())
+            self._cache_meta = data.get('validators', {})
+            self._body_hashes = {
+                url: bytes.fromhex(digest)
+                for url, digest in data.get('body_hashes', {}).items()
+            }
+            self.eoc_states = {
+                url: EOCSiteState(**site)
+                for url, site in data.get('eoc_states', {}).items()
+            }
+            if self.eoc_states:
+                # Publish the restored states on the first cycle even if
+                # the poll short-circuits, so shared_state and the alert
+                # manager see them immediately
+                self._dirty = True
+            logger.info(f"Loaded EOC cache metadata from {self._cache_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load EOC cache metadata: {e}")
+
+    def _save_cache(self):
+        """Persist HTTP validators, body hashes and EOC states (atomic write)"""
+        try:
+            data = {
+                'validators': self._cache_meta,
+                'body_hashes': {
+                    url: digest.hex() for url, digest in self._body_hashes.items()
+                },
+                'eoc_states': {
+                    url: asdict(site) for url, site in self.eoc_states.items()
+                }
+            }
+            tmp_path = self._cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save EOC cache metadata: {e}")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=4,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
     async def start(self):
         """Start the monitoring loop"""
         logger.info("EOC monitor started")
-        
+
+        fail_count = 0
         while True:
             try:
                 await self.check_eoc_sites()
+                fail_count = 0
                 await asyncio.sleep(self.check_interval)
             except Exception as e:
                 logger.error(f"Error in EOC monitor: {e}")
-                await asyncio.sleep(60)
+                # Exponential backoff with jitter, capped at the normal
+                # interval, so repeated failures don't retry in lockstep
+                fail_count += 1
+                delay = min(self.check_interval, 5 * 2 ** fail_count) * random.uniform(0.5, 1.5)
+                await asyncio.sleep(delay)
     
     async def check_eoc_sites(self):
         """Check all configured EOC sites"""
@@ -56,45 +210,126 @@ class EOCMonitor:
             logger.debug("No EOC URLs configured, skipping check")
             return
             
-        logger.info(f"Checking {len(self.eoc_urls)} EOC site(s)...")
-        
+        logger.info("Checking %d EOC site(s)...", len(self.eoc_urls))
+
+        # One timestamp per cycle; every site/sensor update in this pass
+        # shares it instead of re-running datetime.now().isoformat()
+        now_iso = datetime.now().isoformat()
+
+        tasks = []
         for url in self.eoc_urls:
-            if url and 'disaster.townsville.qld.gov.au' in url:
-                await self.check_guardian_ims()
+            handler = self._site_handlers.get(urlparse(url).hostname) if url else None
+            if handler:
+                tasks.append(self._check_site(handler, now_iso))
             else:
                 logger.warning(f"Unsupported EOC URL: {url}")
+
+        # Run site checks concurrently; one failing site shouldn't cancel
+        # the rest of the batch
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error checking EOC site: {result}")
+
+        # Push one coalesced sensor update per cycle instead of one HA
+        # write (and alert-manager evaluation) per site
+        if self._dirty:
+            self._dirty = False
+            await self.update_sensor(now_iso)
+
+        # Persist refreshed validators/hashes off the event loop
+        if self._cache_dirty:
+            self._cache_dirty = False
+            await asyncio.to_thread(self._save_cache)
+
+    async def _check_site(self, handler, now_iso: str):
+        """Run a site handler, gated by the concurrency semaphore"""
+        async with self._check_sem:
+            await handler(now_iso)
     
-    async def check_guardian_ims(self):
+    async def check_guardian_ims(self, now_iso: str = None):
         """Check Guardian IMS API for Townsville LDMG status"""
-        # Add timestamp to prevent caching
-        url = f"{self.guardian_api_url}?t={int(time.time() * 1000)}"
-        
-        logger.info(f"Checking Guardian IMS API: {url}")
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+        # Conditional GET below replaces the old ?t= cache-buster - the
+        # validators make intermediary caches serve correctly instead of
+        # being bypassed entirely
+        url = self.guardian_api_url
+
+        logger.info("Checking Guardian IMS API: %s", url)
+
+        # Send stored validators so an unchanged response costs a 304
+        # instead of a full download + reprocess
+        headers = {}
+        meta = self._cache_meta.get(self.guardian_api_url)
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"Retrieved Guardian IMS data: {len(str(data))} bytes")
-                        await self.process_guardian_response(data)
-                    else:
-                        logger.error(f"Failed to fetch Guardian IMS API: {response.status}")
+            session = await self._get_session()
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    logger.debug("Guardian IMS unchanged (304 Not Modified)")
+                    if self.guardian_api_url in self.eoc_states:
+                        self.eoc_states[self.guardian_api_url].last_check = now_iso
+                    return
+                if response.status == 200:
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    if etag or last_modified:
+                        self._cache_meta[self.guardian_api_url] = {
+                            'etag': etag,
+                            'last_modified': last_modified
+                        }
+                        self._cache_dirty = True
+                    # Stream the body in chunks so an oversized response
+                    # is abandoned early instead of buffered whole
+                    buf = bytearray()
+                    async for chunk in response.content.iter_chunked(65536):
+                        buf += chunk
+                        if len(buf) > self._max_body_bytes:
+                            logger.error(f"Guardian IMS response exceeded {self._max_body_bytes} bytes, aborting")
+                            return
+                    raw = bytes(buf)
+                    # blake2b is a fast keyed hash; 8 bytes is plenty for
+                    # equality checks and comparison stays O(1)
+                    body_hash = hashlib.blake2b(raw, digest_size=8).digest()
+                    if body_hash == self._body_hashes.get(self.guardian_api_url):
+                        # Identical body - skip the JSON parse and all of
+                        # the downstream processing, just bump last_check
+                        logger.debug("Guardian IMS body unchanged, skipping processing")
+                        if self.guardian_api_url in self.eoc_states:
+                            self.eoc_states[self.guardian_api_url].last_check = now_iso
+                        return
+                    self._body_hashes[self.guardian_api_url] = body_hash
+                    self._cache_dirty = True
+                    data = _json_loads(raw)
+                    logger.info("Retrieved Guardian IMS data: %d bytes", len(raw))
+                    await self.process_guardian_response(data, now_iso)
+                else:
+                    logger.error(f"Failed to fetch Guardian IMS API: {response.status}")
         except Exception as e:
             logger.error(f"Error checking Guardian IMS: {e}", exc_info=True)
     
-    async def process_guardian_response(self, data: Dict):
+    async def process_guardian_response(self, data: Dict, now_iso: str = None):
         """
         Process Guardian IMS API response
-        
+
         Args:
             data: JSON response from Guardian IMS API
+            now_iso: Timestamp for this poll cycle (defaults to now)
         """
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
         try:
             features = data.get('features', [])
             if not features:
                 logger.warning("No features found in Guardian IMS response")
                 self.eoc_states.clear()
-                await self.update_sensor()
+                self._dirty = True
                 return
             
             # Extract operation status from first feature
@@ -105,23 +340,24 @@ class EOCMonitor:
             operation_name = properties.get('operationname', '').strip()
             status_description = properties.get('statusdescription', '').strip()
             
-            logger.info(f"Guardian IMS - Operation: {operation_name}, Status: {operation_status}")
+            logger.info("Guardian IMS - Operation: %s, Status: %s", operation_name, operation_status)
             
             # Map Guardian IMS status to our EOC states
             eoc_state = self.map_guardian_status(operation_status)
             
             # Store state
             url = self.guardian_api_url
-            old_state = self.eoc_states.get(url, {}).get('state', 'inactive')
-            
-            self.eoc_states[url] = {
-                'state': eoc_state,
-                'activated': eoc_state != 'inactive',
-                'last_check': datetime.now().isoformat(),
-                'operation_name': operation_name,
-                'operation_status': operation_status,
-                'description': status_description[:200]  # Truncate long descriptions
-            }
+            existing = self.eoc_states.get(url)
+            old_state = existing.state if existing else 'inactive'
+
+            self.eoc_states[url] = EOCSiteState(
+                state=eoc_state,
+                activated=eoc_state != 'inactive',
+                last_check=now_iso,
+                operation_name=operation_name,
+                operation_status=operation_status,
+                description=status_description[:200]  # Truncate long descriptions
+            )
             
             # Check for state change
             if old_state != eoc_state:
@@ -136,9 +372,9 @@ class EOCMonitor:
                 # Trigger routine if activated
                 if eoc_state != 'inactive':
                     await self.trigger_eoc_routine(eoc_state)
-            
-            await self.update_sensor()
-            
+
+            self._dirty = True
+
         except Exception as e:
             logger.error(f"Error processing Guardian IMS response: {e}", exc_info=True)
     
@@ -152,25 +388,10 @@ class EOCMonitor:
         Returns:
             EOC state string
         """
-        status_lower = status.lower().strip()
-        
-        # Map Guardian IMS statuses to our states
-        status_map = {
-            'stand up': 'stand up',
-            'standup': 'stand up',
-            'lean forward': 'lean forward',
-            'leanforward': 'lean forward',
-            'alert': 'alert',
-            'stand down': 'stand down',
-            'standdown': 'stand down',
-            'inactive': 'inactive',
-            'closed': 'inactive',
-            'complete': 'inactive'
-        }
-        
-        mapped_state = status_map.get(status_lower, 'inactive')
-        logger.info(f"Mapped Guardian status '{status}' to EOC state '{mapped_state}'")
-        
+        mapped_state = _STATUS_MAP.get(status.strip().casefold(), 'inactive')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Mapped Guardian status '{status}' to EOC state '{mapped_state}'")
+
         return mapped_state
     
     async def trigger_eoc_routine(self, state: str):
@@ -189,32 +410,55 @@ class EOCMonitor:
             routine_key = 'eoc_activated'
         
         if routine_key in routines:
+            # Fan the activations out concurrently - each is its own POST
+            tasks = []
             for action in routines[routine_key]:
                 if action.startswith('scene.'):
-                    await self.ha_client.activate_scene(action)
+                    tasks.append(self.ha_client.activate_scene(action))
                 elif action.startswith('script.'):
-                    await self.ha_client.run_script(action)
-                    
+                    tasks.append(self.ha_client.run_script(action))
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
             logger.info(f"Triggered EOC routine: {routine_key}")
     
-    async def update_sensor(self):
+    async def update_sensor(self, now_iso: str = None):
         """Update the EOC sensor in Home Assistant"""
-        activated_count = sum(1 for state in self.eoc_states.values() if state.get('activated', False))
-        
-        # Get highest priority state
-        priority_order = ['stand up', 'lean forward', 'alert', 'stand down', 'inactive']
-        current_state = 'inactive'
-        for priority_state in priority_order:
-            if any(s.get('state') == priority_state for s in self.eoc_states.values()):
-                current_state = priority_state
-                break
-        
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+
+        # Skip the HA write and shared-state publish when the states are
+        # identical to what was last published
+        signature = tuple(sorted(
+            (url, site.state) for url, site in self.eoc_states.items()
+        ))
+        if signature == self._last_published:
+            logger.debug("EOC states unchanged since last publish, skipping sensor update")
+            return
+        self._last_published = signature
+        # Count activated sites and find the highest-priority state in a
+        # single pass instead of rescanning per priority level
+        inactive_priority = _STATE_PRIORITY['inactive']
+        activated_count = 0
+        best_priority = inactive_priority
+        for site in self.eoc_states.values():
+            if site.activated:
+                activated_count += 1
+            priority = _STATE_PRIORITY.get(site.state, inactive_priority)
+            if priority < best_priority:
+                best_priority = priority
+        current_state = PRIORITY_ORDER[best_priority]
+
+        # Serialize the dataclass records to plain dicts once; the HA
+        # attributes, web UI state and alert manager all share this copy
+        sites = {url: asdict(site) for url, site in self.eoc_states.items()}
+
         attributes = {
             'monitored_sites': len(self.eoc_urls),
             'activated_sites': activated_count,
             'current_state': current_state,
-            'sites': self.eoc_states,
-            'last_check': datetime.now().isoformat()
+            'sites': sites,
+            'last_check': now_iso
         }
         
         state = 'on' if activated_count > 0 else 'off'
@@ -228,16 +472,22 @@ class EOCMonitor:
         
         # Update web UI shared state
         if self.shared_state is not None:
-            self.shared_state['eoc_states'] = self.eoc_states
-            self.shared_state['last_update'] = datetime.now().isoformat()
-            
-            logger.info(f"Updated shared_state with EOC states: {len(self.eoc_states)} sites, current_state={current_state}")
-            logger.debug(f"EOC states detail: {self.eoc_states}")
-            
+            # Publish the snapshot so consumers never observe the records
+            # mid-mutation on a later poll
+            self.shared_state['eoc_states'] = sites
+            self.shared_state['last_update'] = now_iso
+
+            logger.info("Updated shared_state with EOC states: %d sites, current_state=%s",
+                        len(self.eoc_states), current_state)
+            # Stringifying every site record is only worth it when debug
+            # logging is actually on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"EOC states detail: {self.eoc_states}")
+
             # Trigger local alert manager to evaluate state
             if 'alert_manager' in self.shared_state:
                 await self.shared_state['alert_manager'].update_and_trigger(
                     self.shared_state.get('weather_alerts', []),
-                    self.eoc_states
+                    sites
                 )
 
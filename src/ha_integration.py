@@ -1,9 +1,23 @@
 """Home Assistant API integration"""
 import os
+import json
+import asyncio
 import logging
 import aiohttp
 from typing import Optional, Dict, List
 
+# Prefer orjson for parsing/serializing API payloads; fall back to
+# stdlib json so the client still runs without the wheel
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,11 +33,46 @@ class HomeAssistantClient:
         """
         self.token = supervisor_token or os.getenv('SUPERVISOR_TOKEN', '')
         self.base_url = 'http://supervisor/core/api'
+        # Auth-only header dict, built once and reused for every request;
+        # aiohttp adds Content-Type itself when posting with json=
         self.headers = {
+            'Authorization': f'Bearer {self.token}'
+        }
+        # Pre-serialized bodies post explicit Content-Type
+        self._post_headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
-        
+        self._session = None
+        # Last serialized set_state body per entity, to suppress
+        # byte-identical re-POSTs
+        self._last_bodies = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Pooled keep-alive connections to the supervisor - every HA
+            # call is a tiny JSON request, so the TCP handshake dominates
+            # without reuse. No cookies are needed for the Supervisor API.
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=75),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
     async def call_service(self, domain: str, service: str, service_data: Optional[Dict] = None):
         """
         Call a Home Assistant service
@@ -36,14 +85,14 @@ class HomeAssistantClient:
         url = f'{self.base_url}/services/{domain}/{service}'
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=service_data or {}, headers=self.headers) as response:
-                    if response.status == 200:
-                        logger.info(f"Service call successful: {domain}.{service}")
-                        return await response.json()
-                    else:
-                        logger.error(f"Service call failed: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.post(url, json=service_data or {}, headers=self.headers) as response:
+                if response.status == 200:
+                    logger.info(f"Service call successful: {domain}.{service}")
+                    return await response.json(loads=_json_loads)
+                else:
+                    logger.error(f"Service call failed: {response.status}")
+                    return None
         except Exception as e:
             logger.error(f"Error calling service {domain}.{service}: {e}")
             return None
@@ -61,17 +110,38 @@ class HomeAssistantClient:
         url = f'{self.base_url}/states/{entity_id}'
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Failed to get state for {entity_id}: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.get(url, headers=self.headers) as response:
+                if response.status == 200:
+                    return await response.json(loads=_json_loads)
+                else:
+                    logger.error(f"Failed to get state for {entity_id}: {response.status}")
+                    return None
         except Exception as e:
             logger.error(f"Error getting state for {entity_id}: {e}")
             return None
     
+    async def get_all_states(self) -> Optional[List[Dict]]:
+        """
+        Get the states of all entities in one request
+
+        Returns:
+            List of entity state dictionaries or None
+        """
+        url = f'{self.base_url}/states'
+
+        try:
+            session = self._get_session()
+            async with session.get(url, headers=self.headers) as response:
+                if response.status == 200:
+                    return await response.json(loads=_json_loads)
+                else:
+                    logger.error(f"Failed to get states: {response.status}")
+                    return None
+        except Exception as e:
+            logger.error(f"Error getting states: {e}")
+            return None
+
     async def set_state(self, entity_id: str, state: str, attributes: Optional[Dict] = None, unique_id: Optional[str] = None):
         """
         Set state of an entity
@@ -93,18 +163,47 @@ class HomeAssistantClient:
             data['attributes']['unique_id'] = unique_id
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=self.headers) as response:
-                    if response.status in [200, 201]:
-                        logger.info(f"State set for {entity_id}: {state}")
-                        return await response.json()
-                    else:
-                        logger.error(f"Failed to set state for {entity_id}: {response.status}")
-                        return None
+            # Serialize once (orjson when available) and skip the POST
+            # entirely if the payload is identical to the last one sent
+            body = _json_dumps(data)
+            if body == self._last_bodies.get(entity_id):
+                logger.debug(f"State for {entity_id} unchanged, skipping POST")
+                return None
+
+            session = self._get_session()
+            async with session.post(url, data=body, headers=self._post_headers) as response:
+                if response.status in [200, 201]:
+                    logger.info(f"State set for {entity_id}: {state}")
+                    self._last_bodies[entity_id] = body
+                    return await response.json(loads=_json_loads)
+                else:
+                    logger.error(f"Failed to set state for {entity_id}: {response.status}")
+                    return None
         except Exception as e:
             logger.error(f"Error setting state for {entity_id}: {e}")
             return None
     
+    async def set_states(self, updates: List[tuple]):
+        """
+        Set multiple entity states in one batch
+
+        The Supervisor REST API has no bulk write endpoint, so the
+        individual POSTs are fanned out concurrently over the pooled
+        keep-alive connections instead of serially.
+
+        Args:
+            updates: Iterable of (entity_id, state, attributes, unique_id)
+
+        Returns:
+            List of per-update results (response dicts, None, or the
+            exception raised for that update)
+        """
+        return await asyncio.gather(
+            *[self.set_state(entity_id, state, attributes, unique_id)
+              for entity_id, state, attributes, unique_id in updates],
+            return_exceptions=True
+        )
+
     async def send_notification(self, message: str, title: str = "Forewarned Alert"):
         """
         Send a persistent notification
@@ -1,17 +1,79 @@
 """Local Alert State Manager - Determines when to trigger Home Assistant routines"""
+import asyncio
+import functools
+import json
 import logging
+import os
+import re
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Alert levels from lowest to highest priority; index = priority
+_LEVELS = ('none', 'advisory', 'watch', 'warning', 'emergency')
+_LEVEL_IDX = {name: i for i, name in enumerate(_LEVELS)}
+# Active levels in descending priority, for highest-wins scans
+_PRIORITY_DESC = tuple(reversed(_LEVELS[1:]))
+
+# Alert level -> Material Design icon
+_LEVEL_ICONS = {
+    'none': 'mdi:shield-check',
+    'advisory': 'mdi:information',
+    'watch': 'mdi:alert-circle',
+    'warning': 'mdi:alert',
+    'emergency': 'mdi:alarm-light'
+}
+
+# Matches the warning type up to the first " for " (area list) or " - "
+# (trailing description) in one pass, with no intermediate lists
+_SHORT_EVENT_RE = re.compile(r'^(.*?)(?:\s+for\s+|\s+-\s+|$)')
+
+
+@functools.lru_cache(maxsize=256)
+def _short_event(event: str) -> str:
+    """
+    Extract just the warning type from an event title
+
+    Strips area lists (e.g. "Severe Heatwave Warning for the Peninsula...")
+    and trailing descriptions; memoized since the same titles recur for
+    the lifetime of an alert.
+    """
+    return _SHORT_EVENT_RE.match(event).group(1) or event
+
 
 class LocalAlertManager:
     """
     Manages the local alert state which triggers Home Assistant routines.
     This provides a single point of control for all automation triggers.
     """
-    
+
+    # Manual override switch definitions (using switch domain instead of
+    # input_boolean); entity IDs are derived from these in __init__
+    _SWITCH_CONFIGS = {
+        'manual_advisory': {
+            'name': 'Forewarned Manual Advisory',
+            'icon': 'mdi:information-outline',
+            'level': 'advisory'
+        },
+        'manual_watch': {
+            'name': 'Forewarned Manual Watch',
+            'icon': 'mdi:eye-outline',
+            'level': 'watch'
+        },
+        'manual_warning': {
+            'name': 'Forewarned Manual Warning',
+            'icon': 'mdi:alert',
+            'level': 'warning'
+        },
+        'manual_emergency': {
+            'name': 'Forewarned Manual Emergency',
+            'icon': 'mdi:alarm-light',
+            'level': 'emergency'
+        }
+    }
+
     def __init__(self, config: Dict, ha_client, update_callback, voip_integration=None, mqtt_client=None):
         """
         Initialize local alert manager
@@ -35,28 +97,91 @@ class LocalAlertManager:
             'timestamp': None,
             'triggered_by': []
         }
+
+        # Restore the persisted alert state so a restart during an active
+        # alert doesn't re-fire routines/VoIP calls for it
+        self._state_path = config.get('alert_state_path') or self._default_state_path()
+        self._load_state()
         
-        # Define alert levels and their priorities
-        self.alert_levels = {
-            'none': 0,
-            'advisory': 1,
-            'watch': 2,
-            'warning': 3,
-            'emergency': 4
-        }
+        # Alert level priorities (module-level table; kept on the
+        # instance for backwards compatibility)
+        self.alert_levels = _LEVEL_IDX
         
-        # Manual override switch entity IDs (using switch domain instead of input_boolean)
+        # Manual override switch entity IDs, derived from the single
+        # class-level switch table
         self.manual_switches = {
-            'advisory': 'switch.forewarned_manual_advisory',
-            'watch': 'switch.forewarned_manual_watch',
-            'warning': 'switch.forewarned_manual_warning',
-            'emergency': 'switch.forewarned_manual_emergency'
+            cfg['level']: f'switch.forewarned_{switch_id}'
+            for switch_id, cfg in self._SWITCH_CONFIGS.items()
         }
         
         # Set up MQTT callback if client is available
         if self.mqtt_client:
             self.mqtt_client.state_change_callback = self.handle_manual_switch_change
+
+        # Compile the alert rules into per-level predicates up front;
+        # recompiled automatically when the config's alert_rules changes
+        self._compiled_rules = []
+        self._compiled_src = None
+        self._compile_rules()
+
+        # Signature of the last evaluated inputs, to skip re-evaluation
+        # when nothing has changed
+        self._last_input_sig = None
+
+        # Debounce window for coalescing correlated weather + EOC update
+        # bursts into one evaluation (latest inputs win)
+        self._debounce_s = config.get('alert_debounce_seconds', 0.25)
+        self._pending_task = None
+        self._pending_args = None
+
+        # Short-lived snapshot of all HA entity states so the override
+        # check costs one bulk GET instead of one GET per switch
+        self._states_cache = {}
+        self._states_cache_ts = 0.0
+        self._states_ttl = config.get('states_snapshot_ttl', 2.0)
+
+        # Level -> routine key and entity-prefix -> HA call dispatch
+        # tables, built once instead of on every trigger
+        self._routine_key = {
+            'advisory': 'advisory_alert',
+            'watch': 'watch_alert',
+            'warning': 'warning_alert',
+            'emergency': 'emergency_alert'
+        }
+        self._routine_dispatch = {
+            'scene.': ha_client.activate_scene,
+            'script.': ha_client.run_script
+        }
     
+    def _default_state_path(self) -> str:
+        """Pick the alert state file location (HA /data in production)"""
+        if os.path.isdir('/data'):
+            return '/data/forewarned_state.json'
+        return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alert_state.json')
+
+    def _load_state(self):
+        """Load the persisted alert state"""
+        try:
+            with open(self._state_path, 'rb') as f:
+                state = json.loads(f.read())
+            if isinstance(state, dict) and state.get('level') in _LEVEL_IDX:
+                self.current_state = state
+                logger.info(f"Restored alert state: level={state['level']}, active={state.get('active')}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load persisted alert state: {e}")
+
+    def _save_state(self):
+        """Persist the current alert state (atomic write)"""
+        try:
+            tmp_path = self._state_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.current_state, f)
+            os.replace(tmp_path, self._state_path)
+        except Exception as e:
+            logger.warning(f"Could not save alert state: {e}")
+
     async def handle_manual_switch_change(self, switch_id: str, state: bool):
         """
         Handle manual switch state changes from MQTT
@@ -70,74 +195,63 @@ class LocalAlertManager:
     
     async def initialize_manual_switches(self):
         """Initialize manual override switches via MQTT discovery or HA REST API"""
-        switch_configs = {
-            'manual_advisory': {
-                'name': 'Forewarned Manual Advisory',
-                'icon': 'mdi:information-outline',
-                'level': 'advisory'
-            },
-            'manual_watch': {
-                'name': 'Forewarned Manual Watch',
-                'icon': 'mdi:eye-outline',
-                'level': 'watch'
-            },
-            'manual_warning': {
-                'name': 'Forewarned Manual Warning',
-                'icon': 'mdi:alert',
-                'level': 'warning'
-            },
-            'manual_emergency': {
-                'name': 'Forewarned Manual Emergency',
-                'icon': 'mdi:alarm-light',
-                'level': 'emergency'
-            }
-        }
-        
+        switch_configs = self._SWITCH_CONFIGS
+
+
         # If MQTT is enabled, use discovery for switches
         if self.mqtt_client and self.mqtt_client.connected:
             logger.info("Using MQTT discovery to create manual override switches")
-            for switch_id, config in switch_configs.items():
-                # Check current state in HA before publishing discovery
-                entity_id = self.manual_switches.get(config['level'])
-                current_state = False
-                if entity_id:
-                    try:
-                        ha_state = await self.ha_client.get_state(entity_id)
-                        if ha_state and ha_state.get('state') == 'on':
-                            current_state = True
-                            logger.info(f"Preserving existing state for {switch_id}: ON")
-                    except Exception as e:
-                        logger.debug(f"Could not check existing state for {entity_id}: {e}")
-                
-                # Publish discovery (will initialize to OFF)
-                self.mqtt_client.publish_discovery(
-                    switch_id,
-                    config['name'],
-                    config['icon']
-                )
-                
-                # Restore the actual state if it was ON
-                if current_state:
-                    self.mqtt_client.publish_state(switch_id, True)
-                    logger.info(f"Restored {switch_id} to ON")
-                    
+            # Check current HA states concurrently before publishing
+            # discovery (which initializes switches to OFF)
+            items = list(switch_configs.items())
+            ha_states = await asyncio.gather(
+                *[self.ha_client.get_state(self.manual_switches[config['level']])
+                  for _, config in items],
+                return_exceptions=True
+            )
+            batch = []
+            restore = []
+            for (switch_id, config), ha_state in zip(items, ha_states):
+                if isinstance(ha_state, Exception):
+                    logger.debug(f"Could not check existing state for {switch_id}: {ha_state}")
+                elif ha_state and ha_state.get('state') == 'on':
+                    restore.append(switch_id)
+                    logger.info(f"Preserving existing state for {switch_id}: ON")
+                batch.append((switch_id, config['name'], config['icon']))
+
+            # Publish all discovery configs in one flush (initializes to OFF)
+            self.mqtt_client.publish_discovery_batch(batch)
+
+            # Restore the actual state for any that were ON
+            for switch_id in restore:
+                self.mqtt_client.publish_state(switch_id, True)
+                logger.info(f"Restored {switch_id} to ON")
+
+            # Wire the alert sensors to the retained state topic so state
+            # changes cost one MQTT publish instead of six REST writes
+            self.mqtt_client.publish_alert_discovery()
+
             logger.info("Manual override switches created via MQTT discovery")
             return
-        
+
         # Fallback to REST API (temporary switches without unique IDs)
         logger.warning("MQTT not enabled - creating temporary switches via REST API")
         missing_switches = []
-        
-        for level, entity_id in self.manual_switches.items():
-            # Check if switch already exists
-            state = await self.ha_client.get_state(entity_id)
-            if not state:
+
+        # Probe all switches concurrently, then create the missing ones
+        switch_items = list(self.manual_switches.items())
+        states = await asyncio.gather(
+            *[self.ha_client.get_state(entity_id) for _, entity_id in switch_items],
+            return_exceptions=True
+        )
+        create_coros = []
+        for (level, entity_id), state in zip(switch_items, states):
+            if isinstance(state, Exception) or not state:
                 missing_switches.append(entity_id)
                 # Create a temporary state
-                switch_id = f"manual_{level}"
-                config = switch_configs.get(switch_id)
+                config = switch_configs.get(f"manual_{level}")
                 if config:
-                    await self.ha_client.set_state(
+                    create_coros.append(self.ha_client.set_state(
                         entity_id,
                         'off',
                         {
@@ -145,9 +259,11 @@ class LocalAlertManager:
                             'icon': config['icon'],
                             'note': 'Enable MQTT for persistent switches with unique IDs'
                         }
-                    )
+                    ))
             else:
                 logger.info(f"Found existing manual switch: {entity_id}")
+        if create_coros:
+            await asyncio.gather(*create_coros, return_exceptions=True)
         
         if missing_switches:
             logger.warning("Temporary switches created without unique IDs. Enable MQTT for persistent switches.")
@@ -161,188 +277,280 @@ class LocalAlertManager:
         Returns:
             Tuple of (level, reason) or (None, None) if no overrides active
         """
-        # Check switches in priority order (highest to lowest)
-        for level in ['emergency', 'warning', 'watch', 'advisory']:
-            # Try MQTT first if available
-            if self.mqtt_client and self.mqtt_client.connected:
+        levels = _PRIORITY_DESC
+
+        # When MQTT is connected the broker pushes every switch change
+        # into switch_states via on_message, so the cached values are
+        # authoritative - check them locally and skip REST entirely
+        if self.mqtt_client and self.mqtt_client.connected:
+            for level in levels:
                 switch_id = f"manual_{level}"
                 state = self.mqtt_client.get_state(switch_id)
                 if state:
                     return level, f"Manual override: {level.upper()}"
-            
-            # Fallback to HA REST API
+            return None, None
+
+        # Fallback to HA REST API - one bulk states snapshot (refreshed
+        # on a short TTL) indexed in-process instead of one GET per switch
+        await self._refresh_states_snapshot()
+        for level in levels:
             entity_id = self.manual_switches.get(level)
             if not entity_id:
                 continue
-            
-            try:
-                state = await self.ha_client.get_state(entity_id)
-                if state and state.get('state') == 'on':
-                    return level, f"Manual override: {level.upper()}"
-            except Exception as e:
-                logger.debug(f"Could not check manual switch {entity_id}: {e}")
-                continue
-        
+            state = self._states_cache.get(entity_id)
+            if state and state.get('state') == 'on':
+                return level, f"Manual override: {level.upper()}"
+
         return None, None
+
+    async def _refresh_states_snapshot(self):
+        """Refresh the cached HA states snapshot when older than the TTL"""
+        now = time.monotonic()
+        if self._states_cache and now - self._states_cache_ts < self._states_ttl:
+            return
+
+        states = await self.ha_client.get_all_states()
+        if states:
+            self._states_cache = {s['entity_id']: s for s in states}
+            self._states_cache_ts = now
+        else:
+            logger.debug("Could not refresh HA states snapshot")
     
-    def _evaluate_conditions(self, conditions: Dict, weather_alerts: List[Dict], eoc_states: Dict) -> bool:
+    def _compile_conditions(self, conditions: Dict):
         """
-        Evaluate a set of conditions (weather or EOC) with and/or logic
-        
+        Compile a condition block into a predicate callable
+
+        The per-rule dict lookups and target-string lowercasing happen
+        here, once at config load, instead of on every evaluation.
+
         Args:
             conditions: Condition dictionary with operator and rules
-            weather_alerts: List of active weather alerts
-            eoc_states: Dictionary of EOC states
-            
+
         Returns:
-            True if conditions are met, False otherwise
+            Callable taking (weather_alerts, eoc_states) -> bool
         """
         operator = conditions.get('operator', 'or')
         rules = conditions.get('rules', [])
-        
+
         if not rules:
-            return False
-        
-        results = []
-        
+            return lambda weather_lc, active_eoc_lc: False
+
+        predicates = []
+
         for rule in rules:
-            # Weather condition
+            # Weather condition - matches against pre-lowered
+            # (event, severity) tuples
             if 'severity' in rule:
                 target_type = rule.get('type', 'any').lower()
                 target_severity = rule.get('severity', 'any').lower()
-                
-                matched = False
-                for alert in weather_alerts:
-                    alert_type = (alert.get('event', '') or '').lower()
-                    alert_severity = (alert.get('severity', '') or '').lower()
-                    
-                    type_match = (target_type == 'any' or target_type in alert_type)
-                    severity_match = (target_severity == 'any' or target_severity == alert_severity)
-                    
-                    if type_match and severity_match:
-                        matched = True
-                        break
-                
-                results.append(matched)
-            
-            # EOC condition
+
+                def weather_pred(weather_lc, active_eoc_lc,
+                                 _type=target_type, _severity=target_severity):
+                    for alert_type, alert_severity in weather_lc:
+                        if ((_type == 'any' or _type in alert_type) and
+                                (_severity == 'any' or _severity == alert_severity)):
+                            return True
+                    return False
+
+                predicates.append(weather_pred)
+
+            # EOC condition - matches against the pre-lowered set of
+            # activated EOC states
             elif 'state' in rule:
                 target_state = rule.get('state', '').lower()
-                
-                matched = False
-                for url, state_info in eoc_states.items():
-                    if state_info.get('activated', False):
-                        eoc_state = state_info.get('state', 'inactive').lower()
-                        if eoc_state == target_state:
-                            matched = True
-                            break
-                
-                results.append(matched)
-        
-        # Apply operator
-        if operator == 'and':
-            return all(results)
-        else:  # or
-            return any(results)
+
+                def eoc_pred(weather_lc, active_eoc_lc, _state=target_state):
+                    return _state in active_eoc_lc
+
+                predicates.append(eoc_pred)
+
+        combine = all if operator == 'and' else any
+        return lambda weather_lc, active_eoc_lc: combine(
+            pred(weather_lc, active_eoc_lc) for pred in predicates
+        )
+
+    def _compile_rules(self):
+        """Compile the configured alert rules into per-level predicates"""
+        alert_rules = self.config.get('alert_rules', {})
+        compiled = []
+        for level_name in _PRIORITY_DESC:
+            level_config = alert_rules.get(level_name, {})
+            compiled.append((
+                level_name,
+                self._compile_conditions(level_config.get('weather_conditions', {})),
+                self._compile_conditions(level_config.get('eoc_conditions', {})),
+                level_config.get('condition_logic', 'or')
+            ))
+        self._compiled_rules = compiled
+        self._compiled_src = alert_rules
     
-    async def evaluate_alert_state(self, weather_alerts: List[Dict], eoc_states: Dict) -> Dict:
+    async def evaluate_alert_state(self, weather_alerts: List[Dict], eoc_states: Dict,
+                                   manual_override: Optional[tuple] = None) -> Dict:
         """
         Evaluate all conditions and determine the appropriate local alert state
-        
+
         Args:
             weather_alerts: List of active weather alerts
             eoc_states: Dictionary of EOC states
-            
+            manual_override: Optional pre-fetched (level, reason) tuple so
+                callers that already polled the switches avoid a second poll
+
         Returns:
             New alert state dictionary
         """
+        # One timestamp per evaluation; both result paths share it
+        now_iso = datetime.now().isoformat()
+
         # Check for manual overrides first (highest priority)
-        manual_level, manual_reason = await self._check_manual_overrides()
+        if manual_override is not None:
+            manual_level, manual_reason = manual_override
+        else:
+            manual_level, manual_reason = await self._check_manual_overrides()
         if manual_level:
             return {
                 'active': True,
                 'level': manual_level,
                 'reason': manual_reason,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now_iso,
                 'triggered_by': [manual_reason]
             }
         
         triggers = []
-        max_level = 'none'
+        max_level_int = 0
         reasons = []
-        
-        # Get alert rules from config
-        alert_rules = self.config.get('alert_rules', {})
-        
+        seen_reasons = set()
+
+        # Recompile the rule predicates if the config was reloaded (the
+        # web UI swaps in a fresh alert_rules dict on save)
+        if self.config.get('alert_rules', {}) is not self._compiled_src:
+            self._compile_rules()
+
+        # Lowercase the inputs once per evaluation instead of once per
+        # rule x alert pair inside the predicates; the activated-EOC list
+        # is also shared by the reason collection below instead of
+        # rescanning eoc_states per level
+        weather_lc = [((alert.get('event', '') or '').lower(),
+                       (alert.get('severity', '') or '').lower())
+                      for alert in weather_alerts]
+        active_eocs = [state_info.get('state', 'inactive')
+                       for state_info in eoc_states.values()
+                       if state_info.get('activated', False)]
+        active_eoc_lc = {state.lower() for state in active_eocs}
+
         # Check each alert level (from highest to lowest priority)
-        for level_name in ['emergency', 'warning', 'watch', 'advisory']:
-            level_config = alert_rules.get(level_name, {})
-            
-            # Evaluate weather conditions
-            weather_conditions = level_config.get('weather_conditions', {})
-            weather_match = self._evaluate_conditions(weather_conditions, weather_alerts, eoc_states)
-            
-            # Evaluate EOC conditions
-            eoc_conditions = level_config.get('eoc_conditions', {})
-            eoc_match = self._evaluate_conditions(eoc_conditions, weather_alerts, eoc_states)
-            
-            # Apply condition logic
-            condition_logic = level_config.get('condition_logic', 'or')
-            
+        for level_name, weather_pred, eoc_pred, condition_logic in self._compiled_rules:
+            weather_match = weather_pred(weather_lc, active_eoc_lc)
+            eoc_match = eoc_pred(weather_lc, active_eoc_lc)
+
             if condition_logic == 'and':
                 level_triggered = weather_match and eoc_match
             else:  # or
                 level_triggered = weather_match or eoc_match
             
             # If this level is triggered and is higher priority than current max
-            if level_triggered and self.alert_levels[level_name] > self.alert_levels[max_level]:
-                max_level = level_name
-                
-                # Collect triggers and reasons
+            if level_triggered and _LEVEL_IDX[level_name] > max_level_int:
+                max_level_int = _LEVEL_IDX[level_name]
+
+                # Collect triggers and reasons (set membership keeps the
+                # dedup O(1) instead of scanning the growing lists)
                 if weather_match:
                     for alert in weather_alerts:
-                        event = alert.get('event', 'Unknown')
-                        # Extract just the warning type (remove long descriptions and area names)
-                        # Split on " for " to remove area lists (e.g., "Severe Heatwave Warning for the Peninsula...")
-                        short_event = event.split(' for ')[0] if ' for ' in event else event
-                        # Also split on " - " for other formats
-                        short_event = short_event.split(' - ')[0] if ' - ' in short_event else short_event
-                        if short_event not in reasons:
+                        short_event = _short_event(alert.get('event', 'Unknown'))
+                        if short_event not in seen_reasons:
+                            seen_reasons.add(short_event)
                             triggers.append(f"Weather: {short_event}")
                             reasons.append(short_event)
-                
+
                 if eoc_match:
-                    for url, state_info in eoc_states.items():
-                        if state_info.get('activated', False):
-                            eoc_state = state_info.get('state', 'inactive')
-                            trigger_text = f"LDMG: {eoc_state.upper()}"
-                            if trigger_text not in triggers:
-                                triggers.append(trigger_text)
-                                reasons.append(f"LDMG {eoc_state}")
-        
+                    for eoc_state in active_eocs:
+                        eoc_reason = f"LDMG {eoc_state}"
+                        if eoc_reason not in seen_reasons:
+                            seen_reasons.add(eoc_reason)
+                            triggers.append(f"LDMG: {eoc_state.upper()}")
+                            reasons.append(eoc_reason)
+
+                # Levels are evaluated highest-first, so the first hit is
+                # the maximum - skip the lower levels entirely
+                break
+
         # Determine if alert should be active
-        active = max_level != 'none'
+        max_level = _LEVELS[max_level_int]
+        active = max_level_int > 0
         reason = ', '.join(reasons) if reasons else 'No active alerts'
         
         new_state = {
             'active': active,
             'level': max_level,
             'reason': reason,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso,
             'triggered_by': triggers
         }
         
         return new_state
     
     async def update_and_trigger(self, weather_alerts: List[Dict], eoc_states: Dict):
+        """
+        Schedule an alert state evaluation, coalescing rapid bursts
+
+        When the weather and EOC monitors both report within the debounce
+        window, only one evaluation (with the newest inputs) runs instead
+        of two back-to-back evaluations and HA POSTs.
+
+        Args:
+            weather_alerts: List of active weather alerts
+            eoc_states: Dictionary of EOC states
+        """
+        self._pending_args = (weather_alerts, eoc_states)
+        if self._pending_task is None or self._pending_task.done():
+            self._pending_task = asyncio.create_task(self._debounced_evaluate())
+
+    async def _debounced_evaluate(self):
+        """Wait out the debounce window, then evaluate the latest inputs
+
+        Loops until no newer inputs arrived during the evaluation pass:
+        a call landing while _evaluate_and_trigger is awaiting HA would
+        otherwise store fresh _pending_args that nothing ever consumes
+        (this task isn't done, so update_and_trigger won't schedule a
+        new one), delaying the update until the next monitor poll.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self._debounce_s)
+                args = self._pending_args
+                weather_alerts, eoc_states = args
+                await self._evaluate_and_trigger(weather_alerts, eoc_states)
+                # New tuple means a call raced the evaluation; go again
+                if self._pending_args is args:
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in debounced alert evaluation: {e}", exc_info=True)
+
+    async def _evaluate_and_trigger(self, weather_alerts: List[Dict], eoc_states: Dict):
         """
         Update alert state and trigger Home Assistant routines if needed
-        
+
         Args:
             weather_alerts: List of active weather alerts
             eoc_states: Dictionary of EOC states
         """
-        new_state = await self.evaluate_alert_state(weather_alerts, eoc_states)
+        # Skip the full evaluation and HA writes when the inputs are
+        # identical to the last call; the manual override result is part
+        # of the signature so switch flips still get through
+        manual_override = await self._check_manual_overrides()
+        sig = hash((
+            manual_override[0],
+            tuple((alert.get('event'), alert.get('severity')) for alert in weather_alerts),
+            tuple((url, site.get('state'), site.get('activated'))
+                  for url, site in eoc_states.items())
+        ))
+        if sig == self._last_input_sig:
+            logger.debug("Alert inputs unchanged, skipping evaluation")
+            return
+        self._last_input_sig = sig
+
+        new_state = await self.evaluate_alert_state(weather_alerts, eoc_states, manual_override)
         old_state = self.current_state
         
         # Check if state changed
@@ -350,13 +558,49 @@ class LocalAlertManager:
             old_state['active'] != new_state['active'] or
             old_state['level'] != new_state['level']
         )
-        
+        reason_changed = not state_changed and (
+            old_state['reason'] != new_state['reason'] or
+            old_state['triggered_by'] != new_state['triggered_by']
+        )
+
+        if reason_changed:
+            # Same level, different trigger details - refresh the state
+            # and the level sensor only, without re-firing any routines,
+            # notifications or the other five sensor writes
+            logger.info(f"Alert reason updated (level unchanged): {new_state['reason']}")
+            self.current_state = new_state
+            await asyncio.to_thread(self._save_state)
+            self.update_callback(
+                active=new_state['active'],
+                level=new_state['level'],
+                reason=new_state['reason'],
+                triggered_by=new_state['triggered_by']
+            )
+            if (self.mqtt_client and self.mqtt_client.connected
+                    and self.mqtt_client.publish_alert_state(new_state)):
+                return
+            await self.ha_client.set_state(
+                'sensor.forewarned_alert_level',
+                new_state['level'],
+                {
+                    'friendly_name': 'Forewarned Alert Level',
+                    'icon': self._get_icon_for_level(new_state['level']),
+                    'active': new_state['active'],
+                    'reason': new_state['reason'],
+                    'triggered_by': ', '.join(new_state['triggered_by']),
+                    'timestamp': new_state['timestamp']
+                },
+                unique_id='forewarned_alert_level'
+            )
+            return
+
         if state_changed:
             logger.info(f"Local alert state changed: {old_state['level']} -> {new_state['level']}")
             logger.info(f"Reason: {new_state['reason']}")
             
-            # Update the state
+            # Update the state and persist it off the event loop
             self.current_state = new_state
+            await asyncio.to_thread(self._save_state)
             self.update_callback(
                 active=new_state['active'],
                 level=new_state['level'],
@@ -380,42 +624,57 @@ class LocalAlertManager:
         Args:
             state: Current alert state
         """
+        # Prefer one retained MQTT publish - the discovered sensors all
+        # read from the shared state topic, so HA updates its entities
+        # locally without any REST round trips
+        if self.mqtt_client and self.mqtt_client.connected:
+            if self.mqtt_client.publish_alert_state(state):
+                return
+            logger.warning("MQTT alert state publish failed - falling back to REST")
+
+        # Build all six sensor payloads and hand them to the client as
+        # one batch instead of paying six sequential round trips
+        updates = []
+
+        # Joined once; the same string feeds every sensor payload below
+        triggered_by_str = ', '.join(state['triggered_by'])
+
         # Main local alert binary sensor (on/off)
-        await self.ha_client.set_state(
+        updates.append((
             'binary_sensor.forewarned_local_alert',
             'on' if state['active'] else 'off',
             {
                 'friendly_name': 'Forewarned Local Alert Active',
                 'alert_level': state['level'],
                 'reason': state['reason'],
-                'triggered_by': ', '.join(state['triggered_by']),
+                'triggered_by': triggered_by_str,
                 'timestamp': state['timestamp'],
                 'device_class': 'safety'
             },
-            unique_id='forewarned_local_alert'
-        )
-        
+            'forewarned_local_alert'
+        ))
+
         # Individual level sensors for easier automation triggers
-        for level_name in ['advisory', 'watch', 'warning', 'emergency']:
+        for level_name in _LEVELS[1:]:
             entity_id = f'binary_sensor.forewarned_alert_{level_name}'
             is_active = state['active'] and state['level'] == level_name
-            
-            await self.ha_client.set_state(
+
+            updates.append((
                 entity_id,
                 'on' if is_active else 'off',
                 {
                     'friendly_name': f'Forewarned Alert - {level_name.capitalize()}',
                     'icon': 'mdi:alert' if is_active else 'mdi:alert-outline',
                     'reason': state['reason'] if is_active else '',
-                    'triggered_by': ', '.join(state['triggered_by']) if is_active else '',
+                    'triggered_by': triggered_by_str if is_active else '',
                     'timestamp': state['timestamp'] if is_active else None,
                     'device_class': 'safety'
                 },
-                unique_id=f'forewarned_alert_{level_name}'
-            )
-        
+                f'forewarned_alert_{level_name}'
+            ))
+
         # Alert level as a sensor (text state) - USE THIS FOR AUTOMATIONS
-        await self.ha_client.set_state(
+        updates.append((
             'sensor.forewarned_alert_level',
             state['level'],  # State is the level itself: none, advisory, watch, warning, emergency
             {
@@ -423,22 +682,20 @@ class LocalAlertManager:
                 'icon': self._get_icon_for_level(state['level']),
                 'active': state['active'],
                 'reason': state['reason'],
-                'triggered_by': ', '.join(state['triggered_by']),
+                'triggered_by': triggered_by_str,
                 'timestamp': state['timestamp']
             },
-            unique_id='forewarned_alert_level'
-        )
+            'forewarned_alert_level'
+        ))
+
+        results = await self.ha_client.set_states(updates)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error updating alert sensor: {result}")
     
     def _get_icon_for_level(self, level: str) -> str:
         """Get icon for alert level"""
-        icons = {
-            'none': 'mdi:shield-check',
-            'advisory': 'mdi:information',
-            'watch': 'mdi:alert-circle',
-            'warning': 'mdi:alert',
-            'emergency': 'mdi:alarm-light'
-        }
-        return icons.get(level, 'mdi:help-circle')
+        return _LEVEL_ICONS.get(level, 'mdi:help-circle')
     
     async def _trigger_routines(self, new_state: Dict, old_state: Dict):
         """
@@ -450,33 +707,25 @@ class LocalAlertManager:
         """
         level = new_state['level']
         routines = self.config.get('routines', {})
-        
-        # Map alert levels to routine keys
-        routine_mapping = {
-            'advisory': 'advisory_alert',
-            'watch': 'watch_alert',
-            'warning': 'warning_alert',
-            'emergency': 'emergency_alert'
-        }
-        
-        routine_key = routine_mapping.get(level)
+
+        # Fan out the scene/script activations and the notification
+        # concurrently - each is an independent HTTP POST
+        tasks = []
+        routine_key = self._routine_key.get(level)
         if routine_key and routine_key in routines:
-            routine_list = routines[routine_key]
-            
-            for routine in routine_list:
-                if routine.startswith('scene.'):
-                    await self.ha_client.activate_scene(routine)
-                elif routine.startswith('script.'):
-                    await self.ha_client.run_script(routine)
+            for routine in routines[routine_key]:
+                handler = self._routine_dispatch.get(routine.split('.', 1)[0] + '.')
+                if handler:
+                    tasks.append(handler(routine))
                 else:
                     logger.warning(f"Unknown routine type: {routine}")
-        
-        # Send notification
-        await self.ha_client.send_notification(
+
+        tasks.append(self.ha_client.send_notification(
             f"Local alert activated: {new_state['reason']}",
             f"Forewarned - {level.upper()} Alert"
-        )
-        
+        ))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
         # Make VOIP calls if configured
         if self.voip_integration:
             await self._make_voip_calls(level, new_state['reason'])
@@ -502,19 +751,20 @@ class LocalAlertManager:
             return
         
         logger.info(f"Making {len(alert_numbers)} VoIP call(s) for {alert_level} alert")
-        
-        # Make calls to all configured numbers
-        for number in alert_numbers:
-            try:
-                success = await self.voip_integration.make_alert_call(
-                    number, alert_level, reason
-                )
-                if success:
-                    logger.info(f"VoIP call initiated to {number}")
-                else:
-                    logger.error(f"Failed to initiate VoIP call to {number}")
-            except Exception as e:
-                logger.error(f"Error making VoIP call to {number}: {e}")
+
+        # Place calls to all configured numbers concurrently
+        results = await asyncio.gather(
+            *[self.voip_integration.make_alert_call(number, alert_level, reason)
+              for number in alert_numbers],
+            return_exceptions=True
+        )
+        for number, result in zip(alert_numbers, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error making VoIP call to {number}: {result}")
+            elif result:
+                logger.info(f"VoIP call initiated to {number}")
+            else:
+                logger.error(f"Failed to initiate VoIP call to {number}")
     
     async def _trigger_clear_routine(self, old_state: Dict):
         """
@@ -525,15 +775,15 @@ class LocalAlertManager:
         """
         routines = self.config.get('routines', {})
         clear_routines = routines.get('alert_cleared', [])
-        
+
+        tasks = []
         for routine in clear_routines:
-            if routine.startswith('scene.'):
-                await self.ha_client.activate_scene(routine)
-            elif routine.startswith('script.'):
-                await self.ha_client.run_script(routine)
-        
-        # Send notification
-        await self.ha_client.send_notification(
+            handler = self._routine_dispatch.get(routine.split('.', 1)[0] + '.')
+            if handler:
+                tasks.append(handler(routine))
+
+        tasks.append(self.ha_client.send_notification(
             "All alerts have been cleared",
             "Forewarned - All Clear"
-        )
+        ))
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -2,15 +2,44 @@
 import json
 import logging
 import asyncio
+import socket
 import time
 from typing import Dict, Optional, Callable
 import paho.mqtt.client as mqtt
+from paho.mqtt.subscribeoptions import SubscribeOptions
+
+# Prefer orjson for payload serialization; paho accepts bytes directly,
+# skipping the UTF-8 encode on the wire path
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 logger = logging.getLogger(__name__)
 
+# The only subscribed topics are switch command topics, so inbound
+# messages can be matched with a prefix/suffix check instead of a split
+_CMD_PREFIX = "homeassistant/switch/forewarned/"
+_CMD_SUFFIX = "/set"
+
+# Device block shared by all discovery payloads
+_DEVICE_INFO = {
+    "identifiers": ["forewarned_addon"],
+    "name": "Forewarned",
+    "model": "Weather & EOC Alert System",
+    "manufacturer": "Forewarned",
+    "sw_version": "1.0.50"
+}
+
 
 class MQTTIntegration:
     """Handles MQTT discovery and communication with Home Assistant"""
+
+    # Retained topic carrying the full local alert state as JSON; all
+    # discovered alert sensors read from this one topic
+    ALERT_STATE_TOPIC = "forewarned/alert/state"
     
     def __init__(self, config: Dict, state_change_callback: Optional[Callable] = None):
         """
@@ -26,8 +55,42 @@ class MQTTIntegration:
         self.connected = False
         self.switches = {}
         self.switch_states = {}
-        
-    def on_connect(self, client, userdata, flags, rc):
+        # Command topics already subscribed on the current connection,
+        # so reconnects and repeat discovery don't re-subscribe
+        self._subscribed = set()
+        # Serialized discovery payloads; the config for a given switch
+        # never changes at runtime, so encode it once
+        self._discovery_bytes_cache = {}
+        # Event loop and connection event, set up in connect(); paho
+        # callbacks run on its network thread and signal through these
+        self._loop = None
+        self._connected_event = None
+        # Inbound switch commands are queued from the paho thread and
+        # drained by a consumer coroutine on the event loop
+        self._msg_queue = None
+        self._consumer_task = None
+
+    def _subscribe_new_switches(self, client):
+        """Subscribe to any switch command topics not yet subscribed
+
+        Sends one multi-filter SUBSCRIBE packet for all the missing
+        topics instead of one packet (and one SUBACK round-trip) per
+        switch.
+        """
+        # retainHandling=1 skips the retained-message re-flood when a
+        # subscription already exists on the broker
+        topics = [
+            (_CMD_PREFIX + switch_id + _CMD_SUFFIX,
+             SubscribeOptions(qos=1, retainHandling=1))
+            for switch_id in self.switches
+            if switch_id not in self._subscribed
+        ]
+        if topics:
+            client.subscribe(topics)
+            self._subscribed.update(self.switches.keys() - self._subscribed)
+            logger.debug(f"Subscribed to {len(topics)} switch command topics")
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback when connected to MQTT broker"""
         rc_messages = {
             0: "Connection successful",
@@ -41,49 +104,79 @@ class MQTTIntegration:
         if rc == 0:
             logger.info(f"✓ MQTT broker connection successful")
             self.connected = True
-            # Subscribe to all command topics
+            # Subscribe to all command topics in one SUBSCRIBE packet
             if len(self.switches) > 0:
-                for switch_id in self.switches:
-                    command_topic = f"homeassistant/switch/forewarned/{switch_id}/set"
-                    client.subscribe(command_topic)
-                logger.debug(f"Subscribed to {len(self.switches)} switch command topics")
+                self._subscribe_new_switches(client)
             else:
                 logger.debug("No switches configured yet - will subscribe after discovery")
         else:
-            error_msg = rc_messages.get(rc, f"Unknown error code {rc}")
+            # rc is an int under MQTTv3 and a ReasonCodes under MQTTv5
+            error_msg = rc_messages.get(getattr(rc, 'value', rc), f"Connection refused: {rc}")
             logger.error(f"✗ MQTT connection failed: {error_msg}")
             self.connected = False
+
+        # Wake the coroutine waiting in connect() - on failure too, so
+        # it reports immediately instead of running out the timeout
+        if self._loop is not None and self._connected_event is not None:
+            self._loop.call_soon_threadsafe(self._connected_event.set)
             
-    def on_disconnect(self, client, userdata, rc):
+    def on_disconnect(self, client, userdata, rc, properties=None):
         """Callback when disconnected from MQTT broker"""
         logger.warning(f"Disconnected from MQTT broker (rc={rc})")
         self.connected = False
+        # Subscriptions die with the connection
+        self._subscribed.clear()
         
     def on_message(self, client, userdata, msg):
-        """Callback when message received"""
+        """Callback when message received (runs on the paho network thread)
+
+        Only the cheap topic/payload parse happens here; the state
+        update, confirmation publish and callback all run on the event
+        loop via the message queue, so the network thread never calls
+        into asyncio directly.
+        """
         try:
             # Extract switch ID from topic
             # Topic format: homeassistant/switch/forewarned/{switch_id}/set
-            parts = msg.topic.split('/')
-            if len(parts) >= 4 and parts[0] == 'homeassistant' and parts[1] == 'switch':
-                switch_id = parts[3]
-                state = msg.payload.decode('utf-8').upper()
-                
-                if switch_id in self.switches:
-                    logger.info(f"Switch {switch_id} state changed to {state}")
-                    self.switch_states[switch_id] = (state == 'ON')
-                    
-                    # Publish state confirmation
-                    state_topic = f"homeassistant/switch/forewarned/{switch_id}/state"
-                    client.publish(state_topic, state, retain=True)
-                    
-                    # Call state change callback if provided
-                    if self.state_change_callback:
-                        asyncio.create_task(self.state_change_callback(switch_id, state == 'ON'))
-                        
+            topic = msg.topic
+            if not (topic.startswith(_CMD_PREFIX) and topic.endswith(_CMD_SUFFIX)):
+                return
+            switch_id = topic[len(_CMD_PREFIX):-len(_CMD_SUFFIX)]
+            # bytes.upper() is a C-level byteswap; no utf-8 decode or
+            # str allocation needed just to test for ON/OFF
+            is_on = msg.payload.upper() == b'ON'
+
+            if switch_id in self.switches and self._loop is not None:
+                self._loop.call_soon_threadsafe(
+                    self._msg_queue.put_nowait, (switch_id, is_on)
+                )
+
         except Exception as e:
             logger.error(f"Error processing MQTT message: {e}")
-            
+
+    async def _consume_messages(self):
+        """Drain queued switch commands on the event loop
+
+        Handles the work on_message used to do from the paho thread:
+        recording the new state, publishing the retained confirmation
+        and awaiting the state change callback.
+        """
+        while True:
+            switch_id, is_on = await self._msg_queue.get()
+            try:
+                state = b'ON' if is_on else b'OFF'
+                logger.info(f"Switch {switch_id} state changed to {state.decode()}")
+                self.switch_states[switch_id] = is_on
+
+                # Publish state confirmation
+                state_topic = f"homeassistant/switch/forewarned/{switch_id}/state"
+                self.client.publish(state_topic, state, retain=True)
+
+                if self.state_change_callback:
+                    await self.state_change_callback(switch_id, is_on)
+            except Exception as e:
+                logger.error(f"Error handling switch command for {switch_id}: {e}")
+
     async def connect(self):
         """Connect to MQTT broker"""
         # Prevent multiple simultaneous connections
@@ -101,8 +194,22 @@ class MQTTIntegration:
             
             # Use unique client ID with timestamp to prevent conflicts on restart
             client_id = f"forewarned_addon_{int(time.time())}"
-            self.client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv311)
+            self.client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5)
             logger.info(f"MQTT client ID: {client_id}")
+
+            # Disable Nagle on the broker socket - the traffic is all
+            # small publishes, and coalescing delays them by up to 40ms
+            def _on_socket_open(client, userdata, sock):
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                except OSError as sock_err:
+                    logger.debug(f"Could not set TCP_NODELAY: {sock_err}")
+            self.client.on_socket_open = _on_socket_open
+
+            # Allow a window of outstanding QoS 1 messages so batched
+            # publishes aren't serialized one ACK at a time
+            self.client.max_inflight_messages_set(50)
+            self.client.max_queued_messages_set(0)
             
             # Disable automatic reconnection to prevent loops
             self.client.reconnect_delay_set(min_delay=1, max_delay=120)
@@ -116,7 +223,13 @@ class MQTTIntegration:
             self.client.on_connect = self.on_connect
             self.client.on_disconnect = self.on_disconnect
             self.client.on_message = self.on_message
-            
+
+            # Signalled from on_connect via call_soon_threadsafe
+            self._loop = asyncio.get_running_loop()
+            self._connected_event = asyncio.Event()
+            self._msg_queue = asyncio.Queue()
+            self._consumer_task = asyncio.create_task(self._consume_messages())
+
             logger.info(f"Attempting to connect to MQTT broker at {broker}:{port}...")
             try:
                 self.client.connect_async(broker, port, 60)
@@ -126,16 +239,19 @@ class MQTTIntegration:
                 logger.error(f"Check that the broker '{broker}' is reachable and port {port} is correct")
                 return False
             
-            # Wait for connection
-            for i in range(30):  # 30 second timeout
-                if self.connected:
-                    logger.info(f"MQTT connection established after {i+1} seconds")
-                    return True
-                await asyncio.sleep(1)
-                
-            logger.error(f"Timeout waiting for MQTT connection to {broker}:{port}")
-            logger.error("Possible issues: broker not running, incorrect hostname/IP, firewall blocking connection")
-            logger.error("Try using the broker's IP address instead of hostname if using 'core-mosquitto'")
+            # Wait for on_connect to signal instead of polling
+            try:
+                await asyncio.wait_for(self._connected_event.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout waiting for MQTT connection to {broker}:{port}")
+                logger.error("Possible issues: broker not running, incorrect hostname/IP, firewall blocking connection")
+                logger.error("Try using the broker's IP address instead of hostname if using 'core-mosquitto'")
+                return False
+
+            if self.connected:
+                logger.info("MQTT connection established")
+                return True
+            # on_connect fired with a failure rc and already logged why
             return False
             
         except Exception as e:
@@ -145,69 +261,96 @@ class MQTTIntegration:
     def publish_discovery(self, switch_id: str, name: str, icon: str = "mdi:alert"):
         """
         Publish MQTT discovery message for a switch
-        
+
         Args:
             switch_id: Unique identifier for the switch (e.g., 'manual_advisory')
             name: Friendly name for the switch
             icon: Material Design Icon for the switch
         """
+        return self.publish_discovery_batch([(switch_id, name, icon)])
+
+    def publish_discovery_batch(self, items) -> bool:
+        """
+        Publish discovery and initial state for several switches in one flush
+
+        Every discovery config is enqueued first and every initial OFF
+        state second, without waiting on individual acknowledgements, so
+        paho's writer can coalesce the lot into few TCP segments. The
+        QoS 1 publish handles are then reaped in a single pass instead
+        of paying one ACK round-trip per switch.
+
+        Args:
+            items: Iterable of (switch_id, name, icon) tuples
+
+        Returns:
+            True if every publish was accepted
+        """
         if not self.connected:
             logger.error("Cannot publish discovery - not connected to MQTT")
             return False
-            
+
         try:
-            # Discovery topic
-            discovery_topic = f"homeassistant/switch/forewarned/{switch_id}/config"
-            
-            # Command and state topics
-            command_topic = f"homeassistant/switch/forewarned/{switch_id}/set"
-            state_topic = f"homeassistant/switch/forewarned/{switch_id}/state"
-            
-            # Build discovery payload
-            discovery_payload = {
-                "name": name,
-                "unique_id": f"forewarned_{switch_id}",
-                "command_topic": command_topic,
-                "state_topic": state_topic,
-                "payload_on": "ON",
-                "payload_off": "OFF",
-                "state_on": "ON",
-                "state_off": "OFF",
-                "icon": icon,
-                "device": {
-                    "identifiers": ["forewarned_addon"],
-                    "name": "Forewarned",
-                    "model": "Weather & EOC Alert System",
-                    "manufacturer": "Forewarned",
-                    "sw_version": "1.0.50"
-                }
-            }
-            
-            # Publish discovery message
-            result = self.client.publish(
-                discovery_topic,
-                json.dumps(discovery_payload),
-                qos=1,
-                retain=True
-            )
-            
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Published discovery for {switch_id}")
+            pending = []
+            state_topics = []
+            for switch_id, name, icon in items:
+                command_topic = _CMD_PREFIX + switch_id + _CMD_SUFFIX
+                state_topic = f"homeassistant/switch/forewarned/{switch_id}/state"
+
+                payload_bytes = self._discovery_bytes_cache.get((switch_id, name, icon))
+                if payload_bytes is None:
+                    discovery_payload = {
+                        "name": name,
+                        "unique_id": f"forewarned_{switch_id}",
+                        "command_topic": command_topic,
+                        "state_topic": state_topic,
+                        "payload_on": "ON",
+                        "payload_off": "OFF",
+                        "state_on": "ON",
+                        "state_off": "OFF",
+                        "icon": icon,
+                        "device": _DEVICE_INFO
+                    }
+                    payload_bytes = _json_dumps(discovery_payload)
+                    self._discovery_bytes_cache[(switch_id, name, icon)] = payload_bytes
+
+                info = self.client.publish(
+                    f"homeassistant/switch/forewarned/{switch_id}/config",
+                    payload_bytes,
+                    qos=1,
+                    retain=True
+                )
+                pending.append((switch_id, info))
+
                 self.switches[switch_id] = {
                     'name': name,
                     'command_topic': command_topic,
                     'state_topic': state_topic
                 }
-                
-                # Initialize state as OFF
                 self.switch_states[switch_id] = False
-                self.client.publish(state_topic, "OFF", retain=True)
-                
-                return True
-            else:
-                logger.error(f"Failed to publish discovery for {switch_id}: {result.rc}")
-                return False
-                
+                state_topics.append(state_topic)
+
+            # Newly discovered switches need their command topics
+            self._subscribe_new_switches(self.client)
+
+            # Initial states go out after all the configs are queued
+            for state_topic in state_topics:
+                pending.append((None, self.client.publish(state_topic, "OFF", retain=True)))
+
+            # One reap pass over the whole batch
+            all_ok = True
+            for switch_id, info in pending:
+                try:
+                    info.wait_for_publish(timeout=5)
+                except Exception as wait_err:
+                    logger.warning(f"Timed out waiting for publish acknowledgement: {wait_err}")
+                if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    all_ok = False
+                    logger.error(f"Failed to publish discovery for {switch_id or 'state topic'}: {info.rc}")
+
+            if all_ok:
+                logger.info(f"Published discovery for {len(state_topics)} switch(es)")
+            return all_ok
+
         except Exception as e:
             logger.error(f"Error publishing discovery: {e}")
             return False
@@ -245,12 +388,103 @@ class MQTTIntegration:
             logger.error(f"Error publishing state: {e}")
             return False
             
+    def publish_alert_discovery(self):
+        """
+        Publish discovery configs for the local alert sensors
+
+        All six entities (the main binary sensor, four per-level binary
+        sensors and the alert level sensor) read from the shared retained
+        alert-state topic via value templates, so a single publish there
+        updates every entity without any REST traffic.
+        """
+        if not self.connected:
+            logger.error("Cannot publish alert discovery - not connected to MQTT")
+            return False
+
+        try:
+            configs = [(
+                "binary_sensor", "local_alert",
+                {
+                    "name": "Forewarned Local Alert Active",
+                    "device_class": "safety",
+                    "value_template": "{{ 'ON' if value_json.active else 'OFF' }}"
+                }
+            ), (
+                "sensor", "alert_level",
+                {
+                    "name": "Forewarned Alert Level",
+                    "value_template": "{{ value_json.level }}"
+                }
+            )]
+            for level in ('advisory', 'watch', 'warning', 'emergency'):
+                configs.append((
+                    "binary_sensor", f"alert_{level}",
+                    {
+                        "name": f"Forewarned Alert - {level.capitalize()}",
+                        "device_class": "safety",
+                        "value_template": (
+                            "{{ 'ON' if value_json.active and value_json.level == '"
+                            + level + "' else 'OFF' }}"
+                        )
+                    }
+                ))
+
+            for component, object_id, extra in configs:
+                payload = {
+                    "unique_id": f"forewarned_{object_id}",
+                    # Pin the entity ID to the documented forewarned_*
+                    # names instead of letting HA derive it from "name"
+                    "object_id": f"forewarned_{object_id}",
+                    "state_topic": self.ALERT_STATE_TOPIC,
+                    "json_attributes_topic": self.ALERT_STATE_TOPIC,
+                    "device": _DEVICE_INFO,
+                    **extra
+                }
+                topic = f"homeassistant/{component}/forewarned/{object_id}/config"
+                self.client.publish(topic, _json_dumps(payload), qos=1, retain=True)
+
+            logger.info("Published discovery for alert state sensors")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error publishing alert discovery: {e}")
+            return False
+
+    def publish_alert_state(self, state: Dict) -> bool:
+        """
+        Publish the local alert state as one retained JSON message
+
+        Args:
+            state: Alert state dictionary (active, level, reason, ...)
+
+        Returns:
+            True if the publish was accepted
+        """
+        if not self.connected:
+            logger.warning("Cannot publish alert state - not connected")
+            return False
+
+        try:
+            result = self.client.publish(
+                self.ALERT_STATE_TOPIC,
+                _json_dumps(state),
+                qos=1,
+                retain=True
+            )
+            return result.rc == mqtt.MQTT_ERR_SUCCESS
+        except Exception as e:
+            logger.error(f"Error publishing alert state: {e}")
+            return False
+
     def get_state(self, switch_id: str) -> Optional[bool]:
         """Get current switch state"""
         return self.switch_states.get(switch_id)
         
     def disconnect(self):
         """Disconnect from MQTT broker"""
+        if self._consumer_task is not None:
+            self._consumer_task.cancel()
+            self._consumer_task = None
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
@@ -1,6 +1,9 @@
 """VOIP/SIP Integration for Forewarned"""
+import functools
 import logging
 import asyncio
+import re
+import aiohttp
 from typing import Optional, Dict, Callable
 import os
 import tempfile
@@ -10,6 +13,71 @@ import threading
 
 logger = logging.getLogger(__name__)
 
+# Placeholder tokens in webhook payload templates, e.g. {{extension}}
+_TEMPLATE_TOKEN_RE = re.compile(r'\{\{(\w+)\}\}')
+
+# Spoken per-level context appended to the status message
+_LEVEL_TTS_CONTEXT = {
+    'emergency': "This is an emergency. Take immediate action.",
+    'warning': "This is a warning. Take appropriate precautions.",
+    'watch': "This is a watch alert. Monitor conditions closely.",
+    'advisory': "This is an advisory. Be aware of conditions."
+}
+_LEVEL_NAMES = {level: level.upper() for level in _LEVEL_TTS_CONTEXT}
+
+# Spoken message templates for outbound alert calls
+_ALERT_MESSAGE_TEMPLATES = {
+    'advisory': "Advisory alert: {reason}",
+    'watch': "Watch alert: {reason}. Monitor conditions.",
+    'warning': "Warning! {reason}. Take precautions.",
+    'emergency': "Emergency alert! {reason}. Take immediate action!"
+}
+
+
+@functools.lru_cache(maxsize=128)
+def _alert_message(alert_level: str, reason: str) -> str:
+    """Format the spoken message for one (level, reason) pair, memoized
+
+    Reasons come from a small vocabulary, so call retries for the same
+    alert hit the cache instead of re-formatting.
+    """
+    template = _ALERT_MESSAGE_TEMPLATES.get(alert_level)
+    if template is None:
+        return f"Alert: {reason}"
+    return template.format(reason=reason)
+
+
+def _compile_payload_template(template):
+    """
+    Compile a webhook payload template into a builder callable
+
+    The template shape is fixed at config time, so it is walked once
+    here and turned into nested closures; the hot path then just fills
+    in the {{token}} placeholders from a context dict instead of
+    stringifying the whole dict, doing textual replaces and re-parsing
+    it as JSON (which also broke on values containing quotes).
+
+    Args:
+        template: Template value (dict, list, str or scalar)
+
+    Returns:
+        Callable taking a context dict and returning the built value
+    """
+    if isinstance(template, dict):
+        builders = {key: _compile_payload_template(value) for key, value in template.items()}
+        return lambda ctx: {key: build(ctx) for key, build in builders.items()}
+    if isinstance(template, list):
+        builders = [_compile_payload_template(value) for value in template]
+        return lambda ctx: [build(ctx) for build in builders]
+    if isinstance(template, str) and _TEMPLATE_TOKEN_RE.search(template):
+        def build_str(ctx, _template=template):
+            return _TEMPLATE_TOKEN_RE.sub(
+                lambda m: str(ctx.get(m.group(1), m.group(0))), _template
+            )
+        return build_str
+    # Static leaf - nothing to substitute
+    return lambda ctx, _value=template: _value
+
 # Try to import SIP libraries
 try:
     import pjsua2 as pj
@@ -237,7 +305,13 @@ class VOIPIntegration:
         self.active_calls = {}  # Store references to active Call objects
         self.tts_voice = config.get('tts_voice', 'en-us')  # TTS voice variant
         self.tts_speed = config.get('tts_speed', 160)  # TTS speed (80-450)
-        
+        # Shared HTTP session for webhook calls, created lazily on the
+        # event loop at first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Rendered (tts, twiml, agi) strings per alert-state key, so
+        # call storms on the webhook endpoints don't rebuild them
+        self._tts_cache = {}
+
         if not self.enabled:
             logger.info("VOIP integration disabled")
             return
@@ -252,6 +326,22 @@ class VOIPIntegration:
         elif self.backend == 'ha_notify':
             self._init_ha_notify()
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared webhook HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Keep-alive connections to the PBX endpoint - each alert
+            # call otherwise pays DNS + TCP (+ TLS) setup from scratch
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared webhook HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
     def shutdown(self):
         """Cleanup VoIP resources"""
         if self.backend == 'sip' and hasattr(self, 'ep') and self.ep:
@@ -372,7 +462,24 @@ class VOIPIntegration:
         self.webhook_url = self.config.get('webhook_url', '')
         self.webhook_method = self.config.get('webhook_method', 'POST')
         self.webhook_auth = self.config.get('webhook_auth', {})
-        
+
+        # Compile the payload template once; per-call substitution is
+        # then just token replacement on the string leaves
+        self._payload_builder = _compile_payload_template(
+            self.config.get('webhook_payload_template', {})
+        )
+
+        # Auth credentials don't change at runtime, so build the header
+        # dict once instead of base64-encoding per call
+        self._webhook_headers = {}
+        if self.webhook_auth.get('type') == 'basic':
+            import base64
+            credentials = f"{self.webhook_auth['username']}:{self.webhook_auth['password']}"
+            encoded = base64.b64encode(credentials.encode()).decode()
+            self._webhook_headers['Authorization'] = f'Basic {encoded}'
+        elif self.webhook_auth.get('type') == 'bearer':
+            self._webhook_headers['Authorization'] = f"Bearer {self.webhook_auth['token']}"
+
         logger.info(f"Webhook configured: {self.webhook_method} {self.webhook_url}")
     
     def _init_ha_notify(self):
@@ -495,50 +602,33 @@ class VOIPIntegration:
             "variable": "ALERT_LEVEL=emergency,ALERT_MESSAGE=..."
         }
         """
-        import aiohttp
-        
-        # Build payload based on configuration
-        payload = self.config.get('webhook_payload_template', {}).copy()
-        
-        # Replace placeholders
-        payload_str = str(payload)
-        payload_str = payload_str.replace('{{extension}}', extension)
-        payload_str = payload_str.replace('{{message}}', message)
-        payload_str = payload_str.replace('{{alert_level}}', alert_level)
-        
-        # Convert back to dict
-        import json
-        payload = json.loads(payload_str.replace("'", '"'))
-        
+        # Fill the precompiled payload template
+        payload = self._payload_builder({
+            'extension': extension,
+            'message': message,
+            'alert_level': alert_level
+        })
+
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {}
-                
-                # Add authentication
-                if self.webhook_auth.get('type') == 'basic':
-                    import base64
-                    credentials = f"{self.webhook_auth['username']}:{self.webhook_auth['password']}"
-                    encoded = base64.b64encode(credentials.encode()).decode()
-                    headers['Authorization'] = f'Basic {encoded}'
-                elif self.webhook_auth.get('type') == 'bearer':
-                    headers['Authorization'] = f"Bearer {self.webhook_auth['token']}"
-                
-                if self.webhook_method == 'POST':
-                    async with session.post(self.webhook_url, json=payload, headers=headers) as response:
-                        success = response.status in [200, 201, 202]
-                        if success:
-                            logger.info(f"Webhook call initiated successfully to {extension}")
-                        else:
-                            logger.error(f"Webhook call failed: {response.status}")
-                        return success
-                else:
-                    async with session.get(self.webhook_url, params=payload, headers=headers) as response:
-                        success = response.status in [200, 201, 202]
-                        if success:
-                            logger.info(f"Webhook call initiated successfully to {extension}")
-                        else:
-                            logger.error(f"Webhook call failed: {response.status}")
-                        return success
+            session = self._get_session()
+            headers = self._webhook_headers
+
+            if self.webhook_method == 'POST':
+                async with session.post(self.webhook_url, json=payload, headers=headers) as response:
+                    success = response.status in [200, 201, 202]
+                    if success:
+                        logger.info(f"Webhook call initiated successfully to {extension}")
+                    else:
+                        logger.error(f"Webhook call failed: {response.status}")
+                    return success
+            else:
+                async with session.get(self.webhook_url, params=payload, headers=headers) as response:
+                    success = response.status in [200, 201, 202]
+                    if success:
+                        logger.info(f"Webhook call initiated successfully to {extension}")
+                    else:
+                        logger.error(f"Webhook call failed: {response.status}")
+                    return success
         except Exception as e:
             logger.error(f"Error making webhook call: {e}")
             return False
@@ -565,55 +655,39 @@ class VOIPIntegration:
         Returns:
             Message text for TTS
         """
-        level_messages = {
-            'advisory': f"Advisory alert: {reason}",
-            'watch': f"Watch alert: {reason}. Monitor conditions.",
-            'warning': f"Warning! {reason}. Take precautions.",
-            'emergency': f"Emergency alert! {reason}. Take immediate action!"
-        }
-        
-        return level_messages.get(alert_level, f"Alert: {reason}")
-    
-    def generate_status_tts(self) -> str:
-        """
-        Generate text-to-speech status message for inbound calls
-        
-        Returns:
-            TTS message describing current alert state
-        """
-        state = self.get_alert_state()
-        
-        if not state or not state.get('active'):
-            return "There are currently no active alerts. All systems normal."
-        
-        level = state.get('level', 'unknown')
-        reason = state.get('reason', 'Unknown reason')
-        
-        level_name = level.upper()
-        
-        message = f"Current alert level is {level_name}. {reason}. "
-        
-        # Add additional context based on level
-        if level == 'emergency':
-            message += "This is an emergency. Take immediate action."
-        elif level == 'warning':
-            message += "This is a warning. Take appropriate precautions."
-        elif level == 'watch':
-            message += "This is a watch alert. Monitor conditions closely."
-        elif level == 'advisory':
-            message += "This is an advisory. Be aware of conditions."
-        
-        return message
+        return _alert_message(alert_level, reason)
     
-    def generate_twiml_response(self) -> str:
+    def _status_outputs(self) -> tuple:
         """
-        Generate TwiML response for Twilio-based phone systems
-        
+        Render (tts, twiml, agi) for the current alert state, cached
+
+        All three formats derive from the same spoken message, so one
+        build serves every webhook endpoint; repeat hits for the same
+        (active, level, reason) - e.g. autodialer retries - return the
+        cached strings without any formatting work.
+
         Returns:
-            TwiML XML string
+            Tuple of (tts message, TwiML XML, AGI script)
         """
-        message = self.generate_status_tts()
-        
+        state = self.get_alert_state() or {}
+        key = (state.get('active'), state.get('level'), state.get('reason'))
+
+        cached = self._tts_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if not key[0]:
+            message = "There are currently no active alerts. All systems normal."
+        else:
+            level = state.get('level', 'unknown')
+            reason = state.get('reason', 'Unknown reason')
+
+            level_name = _LEVEL_NAMES.get(level) or level.upper()
+            message = f"Current alert level is {level_name}. {reason}. "
+
+            # Add additional context based on level
+            message += _LEVEL_TTS_CONTEXT.get(level, '')
+
         twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Say voice="alice">{message}</Say>
@@ -624,19 +698,7 @@ class VOIPIntegration:
     </Gather>
     <Say voice="alice">Goodbye.</Say>
 </Response>'''
-        
-        return twiml
-    
-    def generate_asterisk_agi(self) -> str:
-        """
-        Generate Asterisk AGI script commands
-        
-        Returns:
-            AGI commands as string
-        """
-        message = self.generate_status_tts()
-        
-        # Asterisk AGI commands
+
         agi_script = f'''ANSWER
 WAIT 1
 EXEC Set(CHANNEL(language)=en)
@@ -644,8 +706,41 @@ EXEC SayText("{message}")
 WAIT 2
 HANGUP
 '''
-        
-        return agi_script
+
+        # Reasons come from a small vocabulary in practice; the guard
+        # just stops pathological input growing the cache unbounded
+        if len(self._tts_cache) > 64:
+            self._tts_cache.clear()
+        outputs = (message, twiml, agi_script)
+        self._tts_cache[key] = outputs
+        return outputs
+
+    def generate_status_tts(self) -> str:
+        """
+        Generate text-to-speech status message for inbound calls
+
+        Returns:
+            TTS message describing current alert state
+        """
+        return self._status_outputs()[0]
+
+    def generate_twiml_response(self) -> str:
+        """
+        Generate TwiML response for Twilio-based phone systems
+
+        Returns:
+            TwiML XML string
+        """
+        return self._status_outputs()[1]
+
+    def generate_asterisk_agi(self) -> str:
+        """
+        Generate Asterisk AGI script commands
+
+        Returns:
+            AGI commands as string
+        """
+        return self._status_outputs()[2]
 
 
 class VOIPWebhookHandler:
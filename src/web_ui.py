@@ -1,8 +1,8 @@
-"""Flask web UI for Forewarned"""
+"""Quart web UI for Forewarned"""
+import asyncio
 import logging
 import os
-from flask import Flask, render_template, jsonify, request
-from werkzeug.middleware.proxy_fix import ProxyFix
+from quart import Quart, render_template, jsonify, request
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -23,56 +23,54 @@ app_state = {
 
 
 def create_app():
-    """Create and configure Flask application"""
+    """Create and configure Quart application"""
     # Get the base directory (parent of src folder)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     template_dir = os.path.join(base_dir, 'templates')
     static_dir = os.path.join(base_dir, 'static')
-    
-    app = Flask(__name__, 
+
+    app = Quart(__name__,
                 template_folder=template_dir,
                 static_folder=static_dir)
-    
-    # Middleware to handle Home Assistant ingress path
+
+    # ASGI middleware to handle Home Assistant ingress path
     class IngressMiddleware:
-        def __init__(self, wsgi_app):
-            self.wsgi_app = wsgi_app
-            
-        def __call__(self, environ, start_response):
-            # Check for ingress path header
-            ingress_path = environ.get('HTTP_X_INGRESS_PATH', '')
-            if ingress_path:
-                # Set SCRIPT_NAME so Flask generates correct URLs
-                environ['SCRIPT_NAME'] = ingress_path
-                # Remove ingress path from PATH_INFO
-                path_info = environ.get('PATH_INFO', '')
-                if path_info.startswith(ingress_path):
-                    environ['PATH_INFO'] = path_info[len(ingress_path):]
-            return self.wsgi_app(environ, start_response)
-    
-    # Apply ingress middleware first, then proxy fix
-    app.wsgi_app = IngressMiddleware(app.wsgi_app)
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
-    
-    # Disable template caching for development
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
-    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-    
+        def __init__(self, asgi_app):
+            self.asgi_app = asgi_app
+
+        async def __call__(self, scope, receive, send):
+            if scope['type'] == 'http':
+                # Check for ingress path header
+                headers = dict(scope.get('headers') or [])
+                ingress_path = headers.get(b'x-ingress-path', b'').decode('latin-1')
+                if ingress_path:
+                    scope = dict(scope)
+                    # Set root_path so Quart generates correct URLs
+                    scope['root_path'] = ingress_path
+                    # Remove ingress path from the request path
+                    path = scope.get('path', '')
+                    if path.startswith(ingress_path):
+                        scope['path'] = path[len(ingress_path):] or '/'
+            await self.asgi_app(scope, receive, send)
+
+    # Apply ingress middleware (proxy headers are handled by the server)
+    app.asgi_app = IngressMiddleware(app.asgi_app)
+
     # Store VOIP integration reference
     app.voip_integration = None
-    
+
     @app.route('/')
-    def index():
+    async def index():
         """Main dashboard"""
-        return render_template('index.html')
-    
+        return await render_template('index.html')
+
     @app.route('/favicon.ico')
-    def favicon():
+    async def favicon():
         """Serve favicon"""
         return '', 204  # No content
-    
+
     @app.route('/api/status')
-    def api_status():
+    async def api_status():
         """Get current status"""
         eoc_states = app_state.get('eoc_states', {})
         logger.debug(f"/api/status called: {len(eoc_states)} EOC states")
@@ -84,7 +82,7 @@ def create_app():
         })
     
     @app.route('/api/weather')
-    def api_weather():
+    async def api_weather():
         """Get weather alerts"""
         return jsonify({
             'alerts': app_state['weather_alerts'],
@@ -92,7 +90,7 @@ def create_app():
         })
     
     @app.route('/api/eoc')
-    def api_eoc():
+    async def api_eoc():
         """Get EOC states"""
         return jsonify({
             'states': app_state['eoc_states'],
@@ -100,17 +98,17 @@ def create_app():
         })
     
     @app.route('/api/local_alert')
-    def api_local_alert():
+    async def api_local_alert():
         """Get local alert state"""
         return jsonify(app_state['local_alert_state'])
     
     @app.route('/config')
-    def config_page():
+    async def config_page():
         """Configuration page"""
-        return render_template('config.html')
+        return await render_template('config.html')
     
     @app.route('/api/config', methods=['GET'])
-    def api_get_config():
+    async def api_get_config():
         """Get current configuration"""
         from .config import load_config
         config = load_config()
@@ -120,7 +118,7 @@ def create_app():
         })
     
     @app.route('/api/config', methods=['POST'])
-    def api_save_config():
+    async def api_save_config():
         """Save configuration"""
         try:
             from .config import load_config, save_config
@@ -129,7 +127,7 @@ def create_app():
             config = load_config()
             
             # Get new alert rules from request
-            data = request.get_json()
+            data = await request.get_json()
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
@@ -137,8 +135,9 @@ def create_app():
             if 'alert_rules' in data:
                 config['alert_rules'] = data['alert_rules']
             
-            # Save config
-            save_config(config)
+            # Save config off the event loop - a slow SD-card fsync
+            # shouldn't stall other requests
+            await asyncio.to_thread(save_config, config)
             
             # Reload config in alert manager if available
             if 'alert_manager' in app_state:
@@ -151,7 +150,7 @@ def create_app():
             return jsonify({'error': str(e)}), 500
     
     @app.route('/health')
-    def health():
+    async def health():
         """Health check endpoint"""
         return jsonify({
             'status': 'healthy',
@@ -161,9 +160,8 @@ def create_app():
     # ========== VOIP Endpoints ==========
     
     @app.route('/voip/status', methods=['GET', 'POST'])
-    def voip_status():
+    async def voip_status():
         """VOIP status endpoint - returns JSON with current alert state"""
-        from flask import Response
         
         state = app_state['local_alert_state']
         
@@ -194,9 +192,9 @@ def create_app():
         })
     
     @app.route('/voip/twiml', methods=['GET', 'POST'])
-    def voip_twiml():
+    async def voip_twiml():
         """TwiML endpoint for Twilio VOIP integration"""
-        from flask import Response
+        from quart import Response
         
         state = app_state['local_alert_state']
         
@@ -222,15 +220,16 @@ def create_app():
         return Response(twiml, mimetype='text/xml')
     
     @app.route('/voip/menu', methods=['POST'])
-    def voip_menu():
+    async def voip_menu():
         """Handle TwiML menu selections"""
-        from flask import Response
+        from quart import Response
         
-        digit = request.form.get('Digits', '')
+        form = await request.form
+        digit = form.get('Digits', '')
         
         if digit == '1':
             # Repeat - redirect back to status
-            return voip_twiml()
+            return await voip_twiml()
         else:
             # Hang up
             twiml = '''<?xml version="1.0" encoding="UTF-8"?>
@@ -241,9 +240,9 @@ def create_app():
             return Response(twiml, mimetype='text/xml')
     
     @app.route('/voip/agi', methods=['GET'])
-    def voip_agi():
+    async def voip_agi():
         """Asterisk AGI script endpoint"""
-        from flask import Response
+        from quart import Response
         
         state = app_state['local_alert_state']
         
@@ -267,12 +266,12 @@ HANGUP
         return Response(agi_script, mimetype='text/plain')
     
     @app.route('/api/voip/test-call', methods=['POST'])
-    def voip_test_call():
+    async def voip_test_call():
         """Test VOIP call endpoint"""
         if not app.voip_integration:
             return jsonify({'error': 'VOIP integration not configured'}), 400
         
-        data = request.get_json()
+        data = await request.get_json()
         extension = data.get('extension')
         alert_level = data.get('alert_level', 'warning')
         reason = data.get('reason', 'Test call')
@@ -280,13 +279,9 @@ HANGUP
         if not extension:
             return jsonify({'error': 'extension required'}), 400
         
-        # Make the call asynchronously
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        success = loop.run_until_complete(
-            app.voip_integration.make_alert_call(extension, alert_level, reason)
+        # Make the call on the running event loop
+        success = await app.voip_integration.make_alert_call(
+            extension, alert_level, reason
         )
         
         if success: